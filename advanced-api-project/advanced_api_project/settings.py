@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -56,6 +57,19 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Bulk book endpoint (api.views.BookBulkView)
+BOOK_BULK_BATCH_SIZE = 1000  # Rows per bulk_create/bulk_update/delete statement
+BOOK_BULK_MAX_ITEMS = 50000  # Books accepted per request
+
+# Book statistics (api/stats.py)
+BOOK_STATS_CACHE_TIMEOUT = 10 * 60  # Seconds a count per filter combination is kept
+
+# Book export (api/catalog.py, api.views.book_export)
+BOOK_EXPORT_CHUNK_SIZE = 2000  # Rows fetched from the database and written to the response at a time
+
+# Author endpoints (api.views.AuthorViewMixin)
+AUTHOR_MAX_DEPTH = 1  # 1 nests full books under each author; ?depth=0 lists book ids only
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -97,6 +111,17 @@ DATABASES = {
     }
 }
 
+# The catalog version and last-modified time live in the cache (api/catalog.py), keying book counts
+# and export 304s. Set CACHE_URL (e.g. redis://localhost:6379/1) wherever more than one process serves
+# the API: a process-local cache only sees its own changes (api.W001 under `manage.py check --deploy`).
+# Tests always run on a local cache (advanced_api_project/test_runner.py).
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TEST_RUNNER = 'advanced_api_project.test_runner.LocalCacheTestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,18 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class LocalCacheTestRunner(DiscoverRunner):
+    """
+    The default runner with the cache swapped for a process-local one, so tests
+    neither read versions left by other runs nor flush a shared cache (CACHE_URL).
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.local_cache = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+        self.local_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.local_cache.disable()
+        super().teardown_test_environment(**kwargs)
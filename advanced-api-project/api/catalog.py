@@ -0,0 +1,114 @@
+"""
+Change tracking and streaming export for the book catalog.
+
+``catalog_changed()`` runs once a change to books or authors commits (the
+receivers in api/signals.py, and the bulk writes in api/serializers.py, which
+send no signals). Bulk deletes run inside ``batched_changes()``, which
+silences the per-row receivers and moves the catalog once for the whole batch. It moves the catalog version that cached book counts are keyed on
+(api/stats.py) and records the time of the change, which the export
+(api.views.book_export) sends as Last-Modified and checks If-Modified-Since
+against. Both live in the default cache, which every process must share
+(CACHE_URL, see api/checks.py): if they are evicted the catalog simply counts as changed now.
+
+The export writers turn an iterator of books into CSV or NDJSON text, a chunk
+of rows at a time, so a StreamingHttpResponse over them holds only one chunk
+in memory however large the catalog is.
+"""
+import csv
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+VERSION_KEY = 'api:catalog:version'
+MODIFIED_KEY = 'api:catalog:modified'
+EXPORT_FIELDS = ['id', 'title', 'publication_year', 'author_id', 'author_name']
+
+_batching = ContextVar('catalog_batching', default=False)
+
+
+def catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()  # Never reuses an old version after an eviction
+        cache.set(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def catalog_last_modified():
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        modified = timezone.now()
+        cache.set(MODIFIED_KEY, modified, timeout=None)
+    return modified
+
+
+def catalog_changed():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # Not set (or evicted): the next read starts a fresh version anyway
+        pass
+    cache.set(MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def in_batch():
+    """True inside ``batched_changes()``, where per-row receivers leave the catalog alone."""
+    return _batching.get()
+
+
+@contextmanager
+def batched_changes():
+    """Collapse the catalog changes of the writes in the block into one ``catalog_changed()`` on commit."""
+    token = _batching.set(True)
+    try:
+        yield
+    finally:
+        _batching.reset(token)
+    transaction.on_commit(catalog_changed)
+
+
+def export_row(book):
+    return [book.pk, book.title, book.publication_year, book.author_id, book.author.name]
+
+
+def _chunks(books):
+    chunk = []
+    for book in books:
+        chunk.append(export_row(book))
+        if len(chunk) >= settings.BOOK_EXPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def csv_lines(books):
+    """The header, then CSV text for each chunk of books."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in _chunks(books):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():  # An empty catalog still gets its header
+        yield buffer.getvalue()
+
+
+def ndjson_lines(books):
+    """One JSON object per book, a chunk of lines at a time."""
+    for chunk in _chunks(books):
+        yield ''.join(json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in chunk)
+
+
+EXPORT_FORMATS = {  # format -> (writer, content type)
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
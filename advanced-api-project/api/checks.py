@@ -0,0 +1,25 @@
+"""
+Deployment checks for the caches the book catalog depends on.
+
+The catalog version and last-modified time (api/catalog.py) key the cached
+book counts (api/stats.py) and the export's Last-Modified/304 answers. On a
+backend local to each process, a change made through one worker never
+reaches the others, which keep serving stale counts and wrong 304s. Run with
+``manage.py check --deploy``; a single process (runserver, tests) is fine.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_BACKENDS = ['django.core.cache.backends.locmem.LocMemCache']
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Warning(
+        "The 'default' cache is local to each process, so catalog changes do not reach other workers.",
+        hint='Set CACHE_URL to a shared Redis database, unless only one process serves the API.',
+        id='api.W001',
+    )]
@@ -0,0 +1,19 @@
+import django_filters
+from .models import Book
+
+
+# FilterSet for the book list and the book statistics endpoint
+class BookFilter(django_filters.FilterSet):
+    """
+    Exact filters on title, author name and year, plus:
+    - ?publication_year__gte= / ?publication_year__lte= for year ranges
+    - ?author__name__in=Name One,Name Two for several authors at once
+    """
+
+    class Meta:
+        model = Book
+        fields = {
+            'title': ['exact'],
+            'author__name': ['exact', 'in'],
+            'publication_year': ['exact', 'gte', 'lte'],
+        }
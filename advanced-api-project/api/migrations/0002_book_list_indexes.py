@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+# ?search= runs icontains, i.e. UPPER(column) LIKE UPPER('%term%'), which only a trigram index on the same expression can serve
+TRIGRAM_INDEXES = {
+    'book_title_trgm_idx': ('api_book', 'title'),
+    'author_name_trgm_idx': ('api_author', 'name'),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """PostgreSQL only (pg_trgm); other databases fall back to scanning for substring search."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='author',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year', 'title'], name='book_year_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title'], name='book_title_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -3,7 +3,7 @@ from django.db import models
 # Model to represent an Author
 class Author(models.Model):
     # The name of the author (e.g., "J.K. Rowling")
-    name = models.CharField(max_length=255)  # CharField is used to store a string of the author's name
+    name = models.CharField(max_length=255, db_index=True)  # Indexed for ?author__name= filtering on the book list
 
     def __str__(self):
         # String representation of the Author object for easy readability in admin or shell
@@ -23,6 +23,14 @@ class Book(models.Model):
     # The 'on_delete=models.CASCADE' means if an Author is deleted, all their Books will be deleted
     # The 'related_name="books"' allows us to access all books by an author using author.books
 
+    class Meta:
+        # Indexes behind BookListView's filters and ordering; trigram indexes for ?search= are added
+        # on PostgreSQL by migration 0002_book_list_indexes
+        indexes = [
+            models.Index(fields=['publication_year', 'title'], name='book_year_title_idx'),  # ?publication_year=, ordered by title
+            models.Index(fields=['title'], name='book_title_idx'),  # ?title= and the default ordering
+        ]
+
     def __str__(self):
         # String representation of the Book object for easy readability in admin or shell
         return self.title
@@ -0,0 +1,30 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+# Parser for newline-delimited JSON request bodies (one book per line)
+class NDJSONParser(BaseParser):
+    """
+    Parses an ``application/x-ndjson`` body into a list, one JSON document per line.
+    A bad line is reported by its number, and a body with more than BOOK_BULK_MAX_ITEMS
+    rows is rejected as soon as the limit is passed, without decoding the rest. Blank lines are skipped.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if len(rows) == settings.BOOK_BULK_MAX_ITEMS:
+                raise ParseError(f'NDJSON body has more than {settings.BOOK_BULK_MAX_ITEMS} rows.')
+            try:
+                rows.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number}: {exc}')
+        return rows
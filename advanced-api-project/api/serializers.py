@@ -1,29 +1,153 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from .models import Author, Book
+from .catalog import catalog_changed
 from datetime import datetime
 
+
+def as_pk(value):
+    """An integer primary key from JSON input (1 or "1"), or None."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+# Author primary key field that can read from a batch's preloaded authors
+class AuthorField(serializers.PrimaryKeyRelatedField):
+    """
+    Looks the author up in ``context['authors']`` (filled once per batch by BookListSerializer)
+    when it is there, so validating a batch costs one query instead of one per book.
+    """
+
+    def to_internal_value(self, data):
+        authors = self.context.get('authors')
+        if authors is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if as_pk(data) not in authors:
+            self.fail('does_not_exist', pk_value=data)
+        return authors[as_pk(data)]
+
+
+# List mode of BookSerializer, used by the bulk endpoint (api.views.BookBulkView)
+class BookListSerializer(serializers.ListSerializer):
+    """
+    Validates a whole batch with one query for its authors (and, when updating, one for
+    its books) and reads the current year once. Invalid rows do not fail the batch: they
+    are left out of ``validated_data`` and listed in ``row_errors`` by their position.
+    Saving writes with bulk_create/bulk_update in chunks of BOOK_BULK_BATCH_SIZE, in one transaction.
+    """
+
+    def check_batch(self, data):
+        """Reject a body that is not a list, or is empty (unless allow_empty) or longer than max_length."""
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='not_a_list')
+        if not self.allow_empty and not data:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages['empty']]}, code='empty')
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages['max_length'].format(max_length=self.max_length)
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]}, code='max_length')
+
+    def to_internal_value(self, data):
+        self.check_batch(data)
+        rows = [row if isinstance(row, dict) else {} for row in data]
+        self._context = {
+            **self.context,
+            'authors': Author.objects.in_bulk({as_pk(row.get('author')) for row in rows} - {None}),
+            'current_year': datetime.now().year,
+        }
+        ids = [as_pk(row.get('id')) for row in rows]
+        self.books = self.instance.in_bulk(set(ids) - {None}) if self.instance is not None else {}
+
+        self.indexes, self.row_errors, validated = [], [], []
+        seen = set()
+        for index, item in enumerate(data):
+            try:
+                if self.instance is not None:
+                    if ids[index] not in self.books or ids[index] in seen:
+                        raise serializers.ValidationError({'id': ["Expected the id of a book not already in this batch."]})
+                    seen.add(ids[index])
+                    self.child.instance = self.books[ids[index]]
+                attrs = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                self.row_errors.append({'index': index, 'errors': exc.detail})
+            else:
+                if self.instance is not None:
+                    attrs['id'] = ids[index]
+                self.indexes.append(index)
+                validated.append(attrs)
+        self.child.instance = None
+        return validated
+
+    def create(self, validated_data):
+        books = [Book(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            books = Book.objects.bulk_create(books, batch_size=settings.BOOK_BULK_BATCH_SIZE)
+            transaction.on_commit(catalog_changed)  # bulk_create sends no post_save
+        return books
+
+    def update(self, instance, validated_data):
+        books, fields = [], set()
+        for attrs in validated_data:
+            book = self.books[attrs.pop('id')]
+            for field, value in attrs.items():
+                setattr(book, field, value)
+            fields.update(attrs)
+            books.append(book)
+        if books and fields:
+            with transaction.atomic():
+                Book.objects.bulk_update(books, sorted(fields), batch_size=settings.BOOK_BULK_BATCH_SIZE)
+                transaction.on_commit(catalog_changed)
+        return books
+
+
 # Serializer to represent the Book model
 class BookSerializer(serializers.ModelSerializer):
+    author = AuthorField(queryset=Author.objects.all())
+
     class Meta:
         model = Book
         fields = ['title', 'publication_year', 'author']  # Explicitly defining the fields to serialize
+        list_serializer_class = BookListSerializer  # many=True validates and saves in batches
 
     # Custom validation for the publication_year field
     def validate_publication_year(self, value):
         """
         This method validates that the publication year of the book is not in the future.
         If the publication year is greater than the current year, a validation error is raised.
+        In a batch the current year is read once, by BookListSerializer.
         """
-        if value > datetime.now().year:
+        if value > self.context.get('current_year', datetime.now().year):
             raise serializers.ValidationError("Publication year cannot be in the future.")
         return value
 
 
 # Serializer to represent the Author model
 class AuthorSerializer(serializers.ModelSerializer):
+    """
+    An author with their books. Views can narrow it through the serializer context:
+    ``fields`` (a set of field names to keep, for ``?fields=``) and ``depth``
+    (1, the default, nests full books; 0 lists book ids only).
+    The books come from the ``books`` relation, so list views should prefetch it (api.views.author_queryset).
+    """
     # Nesting the BookSerializer to include all the books written by the author
     books = BookSerializer(many=True, read_only=True)  # 'many=True' because an author can have multiple books
 
     class Meta:
         model = Author
-        fields = ['name', 'books']  # Serialize the author's name and their related books
+        fields = ['id', 'name', 'books']  # Serialize the author's id, name and their related books
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+        if 'books' in self.fields and self.context.get('depth', 1) == 0:
+            self.fields['books'] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)  # Ids only
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Author, Book
+from .catalog import catalog_changed, in_batch
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def record_catalog_change(sender, **kwargs):
+    """Any book or author change moves the catalog version and last-modified time (api/catalog.py), once committed."""
+    if not in_batch():  # Bulk writes move the catalog once for the batch
+        transaction.on_commit(catalog_changed)
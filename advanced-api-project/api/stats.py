@@ -0,0 +1,37 @@
+"""
+Book counts grouped by year or by author, for api.views.BookStatsView.
+
+Counting runs in the database (``values()`` + ``annotate(Count)``) and each
+answer is cached per grouping and filter combination. Cache keys include the
+catalog version (api/catalog.py), which moves whenever books or authors
+change, so stale counts are never served.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from .catalog import catalog_version
+
+GROUPS = {  # group_by -> (fields, named expressions) passed to values(); rows are ordered by the expressions
+    'year': ((), {'year': F('publication_year')}),
+    'author': (('author',), {'name': F('author__name')}),
+}
+
+
+def book_counts(queryset, group_by, filters):
+    """
+    [{'year', 'count'}] or [{'author', 'name', 'count'}] for the books in ``queryset``,
+    cached under ``group_by`` and the ``filters`` that produced the queryset.
+    """
+    params = json.dumps([group_by, sorted(filters.items())], default=str)
+    key = f'api:book-stats:{catalog_version()}:{hashlib.md5(params.encode()).hexdigest()}'
+    counts = cache.get(key)
+    if counts is None:
+        fields, expressions = GROUPS[group_by]
+        counts = list(
+            queryset.order_by().values(*fields, **expressions).annotate(count=Count('pk')).order_by(*expressions, *fields)
+        )
+        cache.set(key, counts, settings.BOOK_STATS_CACHE_TIMEOUT)
+    return counts
@@ -1,7 +1,13 @@
+import json
+
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from .checks import check_shared_cache
 from .models import Author, Book
 
 class BookListViewTests(APITestCase):
@@ -114,3 +120,284 @@ class BookDeleteViewTests(APITestCase):
         response = self.client.delete(reverse('book-delete', kwargs={'pk': self.book.pk}))
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class BookBulkViewTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.author = Author.objects.create(name="J.K. Rowling")
+        self.other_author = Author.objects.create(name="J.R.R. Tolkien")
+        self.client.login(username='testuser', password='testpass')
+
+    def test_bulk_create_from_json_array(self):
+        """Test creating many books at once, with invalid rows reported by position"""
+        data = [
+            {"title": f"Book {i}", "publication_year": 2000 + i, "author": self.author.pk}
+            for i in range(20)
+        ]
+        data[3]['publication_year'] = 9999
+        data[5]['author'] = 12345
+        response = self.client.post(reverse('book-bulk'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 18)
+        self.assertEqual([error['index'] for error in response.data['errors']], [3, 5])
+        self.assertIn('publication_year', response.data['errors'][0]['errors'])
+        self.assertEqual(len(response.data['results']), 18)
+        self.assertEqual(Book.objects.get(pk=response.data['results'][-1]['id']).title, "Book 19")
+
+    def test_bulk_create_validates_with_one_author_query(self):
+        """Test that validation cost does not grow with the number of books"""
+        data = [{"title": f"Book {i}", "publication_year": 2000, "author": self.author.pk} for i in range(200)]
+        with self.settings(BOOK_BULK_BATCH_SIZE=50):
+            response = self.client.post(reverse('book-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('book-bulk'), data, format='json')
+        author_queries = [query for query in queries if 'FROM "api_author"' in query['sql']]
+        self.assertEqual(len(author_queries), 1)
+
+    def test_bulk_create_from_ndjson(self):
+        """Test creating books from a newline-delimited JSON stream"""
+        body = "\n".join([
+            '{"title": "One", "publication_year": 1990, "author": %d}' % self.author.pk,
+            '',
+            '{"title": "Two", "publication_year": 1991, "author": %d}' % self.other_author.pk,
+        ])
+        response = self.client.post(reverse('book-bulk'), body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ["One", "Two"])
+
+        response = self.client.post(reverse('book-bulk'), '{"title": "Broken"', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """Test updating many books at once by id, fully or partially"""
+        books = [Book.objects.create(title=f"Old {i}", publication_year=1950, author=self.author) for i in range(3)]
+        data = [
+            {"id": books[0].pk, "title": "New 0", "publication_year": 1951, "author": self.other_author.pk},
+            {"id": books[1].pk, "title": "Missing fields"},
+            {"id": 99999, "title": "Unknown", "publication_year": 1951, "author": self.author.pk},
+        ]
+        response = self.client.put(reverse('book-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        books[0].refresh_from_db()
+        self.assertEqual((books[0].title, books[0].author), ("New 0", self.other_author))
+
+        response = self.client.patch(reverse('book-bulk'), [{"id": books[2].pk, "title": "Patched"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        books[2].refresh_from_db()
+        self.assertEqual((books[2].title, books[2].publication_year), ("Patched", 1950))
+
+    def test_bulk_delete(self):
+        """Test deleting many books at once, with unknown ids reported"""
+        books = [Book.objects.create(title=f"Book {i}", publication_year=1950, author=self.author) for i in range(5)]
+        data = [books[0].pk, {"id": books[1].pk}, 99999, books[2].pk]
+        with self.settings(BOOK_BULK_BATCH_SIZE=2), self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(reverse('book-bulk'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(callbacks), 1)  # One catalog change for the batch, not one per deleted book
+        self.assertEqual([error['index'] for error in response.data['errors']], [2])
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), [books[3].pk, books[4].pk])
+
+    def test_bulk_rejects_empty_and_non_list_bodies(self):
+        """Test that every method answers 400 for an empty batch or a body that is not a list"""
+        Book.objects.create(title="Kept", publication_year=1950, author=self.author)
+        for method in (self.client.post, self.client.put, self.client.delete):
+            for data, code in (([], 'empty'), ({"ids": [1, 2]}, 'not_a_list')):
+                response = method(reverse('book-bulk'), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(response.data['non_field_errors'][0].code, code)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_ndjson_stops_at_the_row_limit(self):
+        """Test that an NDJSON body over BOOK_BULK_MAX_ITEMS is refused while parsing"""
+        line = '{"title": "Row", "publication_year": 1990, "author": %d}' % self.author.pk
+        with self.settings(BOOK_BULK_MAX_ITEMS=3):
+            response = self.client.post(reverse('book-bulk'), "\n".join([line] * 3), content_type='application/x-ndjson')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post(reverse('book-bulk'), "\n".join([line] * 3 + ['not json']), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('more than 3 rows', response.data['detail'])
+
+    def test_bulk_unauthenticated(self):
+        """Test that unauthenticated users cannot use the bulk endpoint"""
+        self.client.logout()
+        response = self.client.post(reverse('book-bulk'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class AuthorViewTests(APITestCase):
+
+    def setUp(self):
+        for i in range(100):
+            author = Author.objects.create(name=f"Author {i:03d}")
+            Book.objects.bulk_create([
+                Book(title=f"Book {i}-{year}", publication_year=year, author=author) for year in (2001, 1999, 2000)
+            ])
+
+    def test_list_authors_costs_two_queries(self):
+        """Test that authors and all their books are fetched in two queries, books oldest first"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('author-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(response.data[0]['name'], "Author 000")
+        self.assertEqual([book['publication_year'] for book in response.data[0]['books']], [1999, 2000, 2001])
+
+    def test_sparse_fieldset(self):
+        """Test that ?fields= keeps only the requested fields and skips the books query when unused"""
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('author-list'), {'fields': 'id,name'})
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+
+    def test_depth_zero_lists_book_ids(self):
+        """Test that ?depth=0 returns book ids instead of nested books"""
+        author = Author.objects.get(name="Author 005")
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('author-detail', kwargs={'pk': author.pk}), {'depth': 0})
+        years = dict(author.books.values_list('pk', 'publication_year'))
+        self.assertEqual([years[pk] for pk in response.data['books']], [1999, 2000, 2001])
+
+class BookListQueryPlanTests(APITestCase):
+    """The filtered book list must read through indexes, never a sequential scan of a table"""
+
+    def setUp(self):
+        for i in range(20):
+            author = Author.objects.create(name=f"Author {i}")
+            Book.objects.bulk_create([
+                Book(title=f"Book {i}-{year}", publication_year=year, author=author) for year in range(1990, 2000)
+            ])
+
+    def plan(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('book-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = next(query['sql'] for query in queries if 'FROM "api_book"' in query['sql'])
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')  # Tiny test tables would be scanned anyway
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoSequentialScan(self, plan):
+        for step in plan:
+            self.assertNotIn('Seq Scan', step, plan)  # PostgreSQL
+            self.assertFalse(step.startswith('SCAN') and 'USING' not in step, plan)  # SQLite: SCAN without an index
+
+    def test_filters_use_indexes(self):
+        """Test the plan for each filter, with the default and the year ordering"""
+        for params in (
+            {'publication_year': 1995},
+            {'publication_year': 1995, 'ordering': '-title'},
+            {'title': 'Book 3-1993'},
+            {'author__name': 'Author 7'},
+            {'author__name': 'Author 7', 'ordering': 'publication_year'},
+            {},  # Unfiltered, in the default title order
+        ):
+            with self.subTest(params=params):
+                self.assertNoSequentialScan(self.plan(params))
+
+class BookFilterAndStatsTests(APITestCase):
+
+    def setUp(self):
+        self.rowling = Author.objects.create(name="J.K. Rowling")
+        self.tolkien = Author.objects.create(name="J.R.R. Tolkien")
+        self.pratchett = Author.objects.create(name="Terry Pratchett")
+        Book.objects.create(title="Harry Potter", publication_year=1997, author=self.rowling)
+        Book.objects.create(title="Chamber of Secrets", publication_year=1998, author=self.rowling)
+        Book.objects.create(title="The Hobbit", publication_year=1937, author=self.tolkien)
+        Book.objects.create(title="The Colour of Magic", publication_year=1983, author=self.pratchett)
+        Book.objects.create(title="Mort", publication_year=1987, author=self.pratchett)
+
+    def titles(self, params):
+        response = self.client.get(reverse('book-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book['title'] for book in response.data]
+
+    def test_year_range_and_author_list_filters(self):
+        """Test filtering by a range of years and by several authors"""
+        self.assertEqual(self.titles({'publication_year__gte': 1985, 'publication_year__lte': 1997}), ["Harry Potter", "Mort"])
+        self.assertEqual(self.titles({'author__name__in': 'J.R.R. Tolkien,Terry Pratchett', 'ordering': 'publication_year'}),
+                         ["The Hobbit", "The Colour of Magic", "Mort"])
+        self.assertEqual(self.titles({'publication_year': 1937}), ["The Hobbit"])  # Exact filters still work
+
+    def test_counts_by_year_and_author(self):
+        """Test the grouped counts, with the same filters as the book list"""
+        response = self.client.get(reverse('book-stats'), {'publication_year__gte': 1990})
+        self.assertEqual(response.data['counts'], [{'year': 1997, 'count': 1}, {'year': 1998, 'count': 1}])
+        response = self.client.get(reverse('book-stats'), {'group_by': 'author'})
+        self.assertEqual(
+            [(row['name'], row['count']) for row in response.data['counts']],
+            [("J.K. Rowling", 2), ("J.R.R. Tolkien", 1), ("Terry Pratchett", 2)],
+        )
+        self.assertEqual(self.client.get(reverse('book-stats'), {'group_by': 'title'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_counts_are_cached_until_books_change(self):
+        """Test that a repeated request is answered from the cache, and that writes expire it"""
+        params = {'group_by': 'author', 'author__name__in': 'Terry Pratchett'}
+        self.client.get(reverse('book-stats'), params)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('book-stats'), params)
+        self.assertEqual(response.data['counts'][0]['count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):  # The catalog moves once the write commits
+            Book.objects.create(title="Guards! Guards!", publication_year=1989, author=self.pratchett)
+            self.assertEqual(self.client.get(reverse('book-stats'), params).data['counts'][0]['count'], 2)
+        self.assertEqual(self.client.get(reverse('book-stats'), params).data['counts'][0]['count'], 3)
+
+class BookExportTests(APITestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Terry Pratchett")
+        for i in range(25):
+            Book.objects.create(title=f"Discworld {i}", publication_year=1983 + i, author=self.author)
+
+    def export(self, export_format, **headers):
+        return self.client.get(reverse('book-export', kwargs={'export_format': export_format}), **headers)
+
+    def test_csv_export_streams_every_book(self):
+        """Test the CSV export, written a chunk of rows at a time"""
+        with self.settings(BOOK_EXPORT_CHUNK_SIZE=10):
+            response = self.export('csv')
+            self.assertTrue(response.streaming)
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        lines = ''.join(chunks).splitlines()
+        self.assertEqual(lines[0], 'id,title,publication_year,author_id,author_name')
+        self.assertEqual(len(lines), 26)
+        self.assertTrue(lines[-1].endswith(',Discworld 24,2007,%d,Terry Pratchett' % self.author.pk))
+
+    def test_ndjson_export_with_filters(self):
+        """Test the NDJSON export, narrowed with the book list's filters"""
+        response = self.client.get(reverse('book-export', kwargs={'export_format': 'ndjson'}), {'publication_year__gte': 2005})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['publication_year'] for row in rows], [2005, 2006, 2007])
+        self.assertEqual(rows[0]['author_name'], "Terry Pratchett")
+        self.assertEqual(self.export('xml').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_conditional_get(self):
+        """Test that an unchanged catalog answers If-Modified-Since and If-None-Match with 304"""
+        response = self.export('csv')
+        last_modified, etag = response['Last-Modified'], response['ETag']
+        self.assertEqual(self.export('csv', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.export('csv', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):  # The catalog moves once the write commits
+            Book.objects.create(title="Mort", publication_year=1987, author=self.author)
+        self.assertEqual(self.export('csv', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_flagged(self):
+        """Test that the deploy check flags a cache each worker keeps to itself"""
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['api.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/1'}})
+    def test_shared_cache_passes(self):
+        """Test that a shared cache passes the check"""
+        self.assertEqual(check_shared_cache(None), [])
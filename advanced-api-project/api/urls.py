@@ -1,10 +1,18 @@
 from django.urls import path
-from .views import BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView
+from .views import (
+    BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView, BookBulkView,
+    AuthorListView, AuthorDetailView, BookStatsView, book_export,
+)
 
 urlpatterns = [
     path('books/', BookListView.as_view(), name='book-list'),  # List all books or create a new book
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),  # Retrieve a single book by pk
+    path('books/stats/', BookStatsView.as_view(), name='book-stats'),  # Book counts by year or author
+    path('books/export.<str:export_format>', book_export, name='book-export'),  # Stream all books as CSV or NDJSON
     path('books/create/', BookCreateView.as_view(), name='book-create'),  # Create a new book
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),  # Update a book by pk
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),  # Delete a book by pk
+    path('books/bulk/', BookBulkView.as_view(), name='book-bulk'),  # Create, update or delete many books at once
+    path('authors/', AuthorListView.as_view(), name='author-list'),  # List all authors with their books
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),  # Retrieve a single author by pk
 ]
@@ -1,8 +1,21 @@
-from rest_framework import generics, filters
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from rest_framework import generics, filters, status
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.response import Response
 from django_filters import rest_framework
-from .models import Book
-from .serializers import BookSerializer
+from .catalog import EXPORT_FORMATS, batched_changes, catalog_last_modified, catalog_version
+from .filters import BookFilter
+from .models import Author, Book
+from .parsers import NDJSONParser
+from .serializers import AuthorSerializer, BookSerializer, as_pk
+from .stats import GROUPS, book_counts
 
 class BookListView(generics.ListAPIView):
     """
@@ -12,13 +25,34 @@ class BookListView(generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     filter_backends = [rest_framework.DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['title', 'author__name', 'publication_year']  # Allow filtering
+    filterset_class = BookFilter  # Allow filtering, including year ranges and several authors (api/filters.py)
     search_fields = ['title', 'author__name']  # Allow searching
     ordering_fields = ['title', 'publication_year']  # Allow ordering
     ordering = ['title']  # Default ordering
     permission_classes = [IsAuthenticatedOrReadOnly]  # Publicly accessible
 
 
+class BookStatsView(generics.GenericAPIView):
+    """
+    API endpoint returning book counts grouped by year (?group_by=year, the default) or by author
+    (?group_by=author), for the books matching the same filters as the book list.
+    Counted in the database and cached per filter combination (api/stats.py).
+    Accessible to unauthenticated users.
+    """
+    queryset = Book.objects.all()
+    filter_backends = [rest_framework.DjangoFilterBackend]
+    filterset_class = BookFilter
+    permission_classes = [IsAuthenticatedOrReadOnly]  # Publicly accessible
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get('group_by', 'year')
+        if group_by not in GROUPS:
+            return Response({'group_by': [f"Expected one of: {', '.join(GROUPS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        filters = {name: request.query_params[name] for name in self.filterset_class.base_filters if name in request.query_params}
+        return Response({'group_by': group_by, 'counts': book_counts(queryset, group_by, filters)})
+
+
 class BookDetailView(generics.RetrieveAPIView):
     """
     API endpoint to retrieve a single book by its ID.
@@ -57,3 +91,153 @@ class BookDeleteView(generics.DestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]  # Only authenticated users can delete
+
+
+class BookBulkView(generics.GenericAPIView):
+    """
+    API endpoint for catalog syncs: many books per request, as a JSON array or an NDJSON stream.
+    POST creates books, PUT/PATCH update them (each row carries the book's "id"), and
+    DELETE removes them (a list of ids, or of {"id": ...} objects).
+    Valid rows are written in one transaction, in chunks of BOOK_BULK_BATCH_SIZE; invalid rows
+    are skipped and reported under "errors" with their position in the request.
+    Restricted to authenticated users.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    parser_classes = [JSONParser, NDJSONParser]
+    permission_classes = [IsAuthenticated]  # Only authenticated users can sync
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_batch_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        books = serializer.save()
+        return self.result(serializer.indexes, books, serializer.row_errors, status.HTTP_201_CREATED)
+
+    def put(self, request, *args, **kwargs):
+        return self.update(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update(request, partial=True)
+
+    def update(self, request, partial):
+        serializer = self.get_batch_serializer(self.get_queryset(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        books = serializer.save()
+        return self.result(serializer.indexes, books, serializer.row_errors, status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        rows = request.data
+        self.get_batch_serializer(data=rows).check_batch(rows)  # Same 400s as POST/PUT
+        ids = [as_pk(row.get('id') if isinstance(row, dict) else row) for row in rows]
+        existing = set()
+        with transaction.atomic(), batched_changes():
+            for start in range(0, len(ids), settings.BOOK_BULK_BATCH_SIZE):
+                chunk = {pk for pk in ids[start:start + settings.BOOK_BULK_BATCH_SIZE] if pk is not None}
+                found = self.get_queryset().filter(pk__in=chunk - existing)
+                existing.update(found.values_list('pk', flat=True))
+                found.delete()
+        deleted, errors = [], []
+        for index, pk in enumerate(ids):
+            if pk in existing:
+                existing.discard(pk)  # Repeated ids count once
+                deleted.append({'index': index, 'id': pk})
+            else:
+                errors.append({'index': index, 'errors': {'id': ["No such book."]}})
+        return Response({'results': deleted, 'errors': errors}, status=status.HTTP_200_OK if deleted or not errors else status.HTTP_400_BAD_REQUEST)
+
+    def get_batch_serializer(self, *args, **kwargs):
+        """A BookListSerializer that rejects empty batches and batches over BOOK_BULK_MAX_ITEMS."""
+        return self.get_serializer(*args, many=True, allow_empty=False, max_length=settings.BOOK_BULK_MAX_ITEMS, **kwargs)
+
+    def result(self, indexes, books, errors, success_status):
+        """{"results": [{"index", "id"}], "errors": [{"index", "errors"}]}; 400 when no row could be saved."""
+        results = [{'index': index, 'id': book.pk} for index, book in zip(indexes, books)]
+        return Response(
+            {'results': results, 'errors': errors},
+            status=success_status if results or not errors else status.HTTP_400_BAD_REQUEST,
+        )
+
+
+def author_queryset(fields=None, depth=1):
+    """
+    Authors with exactly what AuthorSerializer will read: their books, oldest first, in one
+    extra query (only the ids at depth 0), or no books query at all when ``fields`` leaves them out.
+    """
+    queryset = Author.objects.order_by('name', 'pk')
+    if fields and 'books' not in fields:
+        return queryset
+    books = Book.objects.order_by('publication_year', 'title', 'pk')
+    if depth == 0:
+        books = books.only('pk', 'author')
+    return queryset.prefetch_related(Prefetch('books', queryset=books))
+
+
+class AuthorViewMixin:
+    """
+    Shared by the author endpoints: ``?fields=id,name,books`` keeps only those fields and
+    ``?depth=0`` lists book ids instead of nested books (AUTHOR_MAX_DEPTH caps it).
+    Any number of authors costs two queries: the authors, then all their books.
+    """
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]  # Publicly accessible
+
+    def requested_fields(self):
+        fields = self.request.query_params.get('fields', '')
+        return {name.strip() for name in fields.split(',') if name.strip()} or None
+
+    def requested_depth(self):
+        depth = self.request.query_params.get('depth', '')
+        return min(int(depth), settings.AUTHOR_MAX_DEPTH) if depth.isdigit() else settings.AUTHOR_MAX_DEPTH
+
+    def get_queryset(self):
+        return author_queryset(self.requested_fields(), self.requested_depth())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields()
+        context['depth'] = self.requested_depth()
+        return context
+
+
+class AuthorListView(AuthorViewMixin, generics.ListAPIView):
+    """
+    API endpoint to list all authors with their books.
+    Accessible to unauthenticated users.
+    """
+
+
+class AuthorDetailView(AuthorViewMixin, generics.RetrieveAPIView):
+    """
+    API endpoint to retrieve a single author with their books.
+    Accessible to unauthenticated users.
+    """
+
+
+def export_etag(request, export_format):
+    return hashlib.md5(f'{catalog_version()}:{request.get_full_path()}'.encode()).hexdigest()
+
+
+def export_last_modified(request, export_format):
+    return catalog_last_modified()
+
+
+@require_GET
+@condition(etag_func=export_etag, last_modified_func=export_last_modified)
+def book_export(request, export_format):
+    """
+    Streams the whole book catalog (or the books matching the book list's filters) as
+    books.csv or books.ndjson. Books are read with a chunked iterator and written a chunk
+    at a time (BOOK_EXPORT_CHUNK_SIZE), so memory stays flat for any catalog size.
+    Unchanged catalogs answer If-Modified-Since / If-None-Match with 304 (api/catalog.py).
+    Accessible to unauthenticated users.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Unknown export format.")
+    writer, content_type = EXPORT_FORMATS[export_format]
+    filterset = BookFilter(request.GET, queryset=Book.objects.select_related('author').order_by('pk'))
+    if not filterset.is_valid():
+        return JsonResponse(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+    books = filterset.qs.iterator(chunk_size=settings.BOOK_EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(writer(books), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="books.{export_format}"'
+    return response
@@ -6,4 +6,5 @@ class BlogConfig(AppConfig):
     name = 'blog'
 
     def ready(self):
+        import blog.checks
         import blog.signals
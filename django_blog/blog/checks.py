@@ -0,0 +1,28 @@
+"""
+Deployment checks for the caches the blog's pages depend on.
+
+Fragment and page versions (blog/fragments.py, blog/middleware.py), the tag
+cloud (blog/tags.py) and the suggestion index version (blog/suggest.py) are
+purged by writing to the cache. On a backend local to each process, only the
+process that made the change sees the purge: every other worker keeps
+serving stale pages, 304 Not Modified answers and fragments. Run with
+``manage.py check --deploy``; a single process (runserver, tests) is fine.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_BACKENDS = ['django.core.cache.backends.locmem.LocMemCache']
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    warnings = []
+    for alias in ('default', 'template_fragments'):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in PROCESS_LOCAL_BACKENDS:
+            warnings.append(Warning(
+                f"The '{alias}' cache is local to each process, so page and fragment purges do not reach other workers.",
+                hint='Set CACHE_URL to a shared Redis database, unless only one process serves the blog.',
+                id='blog.W001',
+            ))
+    return warnings
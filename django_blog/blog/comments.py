@@ -0,0 +1,56 @@
+"""
+Threaded comments.
+
+Each comment stores its materialized ``path`` (see ``Comment``), so ordering a
+post's comments by path yields every thread depth-first, replies under their
+parents. A page of comments is then one range read on the (post, path) index,
+with the author joined, whatever the thread shapes: the page cursor is simply
+the last path shown.
+"""
+import re
+
+from django.conf import settings
+from django.urls import reverse
+from .models import Comment
+
+CURSOR_RE = re.compile(r'^(\d{10}/)+$')
+
+
+def comment_page(post, after=None, limit=None):
+    """
+    Up to ``limit`` comments of ``post`` in thread order, starting after the ``after``
+    path, and the cursor for the next page (None on the last page).
+    """
+    limit = limit or settings.BLOG_COMMENTS_PER_PAGE
+    comments = Comment.objects.filter(post=post).select_related('author').order_by('path')
+    if after and CURSOR_RE.match(after):
+        comments = comments.filter(path__gt=after)
+    comments = list(comments[:limit + 1])
+    next_cursor = comments[limit - 1].path if len(comments) > limit else None
+    return comments[:limit], next_cursor
+
+
+def reply_parent(parent):
+    """
+    The comment a reply to ``parent`` should hang from: ``parent`` itself, or the
+    ancestor at the deepest allowed level once threads reach BLOG_COMMENT_MAX_DEPTH.
+    """
+    if parent is None or parent.depth < settings.BLOG_COMMENT_MAX_DEPTH - 1:
+        return parent
+    ancestor_id = int(parent.path.split('/')[settings.BLOG_COMMENT_MAX_DEPTH - 2])
+    return Comment.objects.get(pk=ancestor_id)
+
+
+def serialize(comment, user=None):
+    is_author = user is not None and comment.author_id == user.pk
+    return {
+        'id': comment.pk,
+        'parent': comment.parent_id,
+        'depth': comment.depth,
+        'author': comment.author.username,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+        'is_author': is_author,
+        'edit_url': reverse('blog:edit-comment', args=[comment.pk]) if is_author else None,
+        'delete_url': reverse('blog:delete-comment', args=[comment.pk]) if is_author else None,
+    }
@@ -0,0 +1,91 @@
+"""
+Versioned keys for cached template fragments and pages.
+
+Post pages cache their rendered pieces with Django's ``{% cache %}`` tag, keyed
+on the object's current fragment version:
+
+* ``POST``: a post's body and tag list (detail page) and its card (list pages);
+* ``COMMENTS``: the comment block under a post;
+* ``LISTS``: every list page at once (pk ``ALL``), for the anonymous page
+  cache in blog/middleware.py, which also keys post pages on the two above.
+
+Versions live in the default cache and are bumped by the receivers in
+blog/signals.py whenever a post, one of its tags or one of its comments is
+saved or deleted, so an edit moves the page to fresh keys immediately and the
+stale fragments simply age out. Versions expire too (after the longest
+fragment or page timeout), so pages requested for posts that do not exist
+leave nothing behind for long. The cache must be shared by every process
+for them all to see the same versions (CACHE_URL, see blog/checks.py).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import prefetch_related_objects
+
+POST = 'post'
+COMMENTS = 'comments'
+LISTS = 'lists'
+ALL = 'all'
+
+
+def version_key(kind, pk):
+    return f'blog:fragment:{kind}:{pk}'
+
+
+def _timeout():
+    return max(settings.BLOG_FRAGMENT_CACHE_TIMEOUT, settings.BLOG_PAGE_CACHE_TIMEOUT)
+
+
+def _fresh():
+    # Never reuses an old number, so a version evicted from the cache cannot revive stale fragments
+    return time.time_ns()
+
+
+def versions(kind, pks):
+    """{pk: current fragment version}, read in one cache round trip."""
+    keys = {pk: version_key(kind, pk) for pk in pks}
+    found = cache.get_many(keys.values())
+    missing = {key: _fresh() for key in keys.values() if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=_timeout())
+        found.update(missing)
+    return {pk: found[key] for pk, key in keys.items()}
+
+
+def version(kind, pk):
+    return versions(kind, [pk])[pk]
+
+
+def bump(kind, *pks):
+    """Move each object's fragments to new keys."""
+    for pk in pks:
+        try:
+            cache.incr(version_key(kind, pk))
+        except ValueError:  # Never read (or evicted): nothing cached under the old version is reachable
+            cache.set(version_key(kind, pk), _fresh(), timeout=_timeout())
+
+
+def fragment_cache():
+    """The cache ``{% cache %}`` stores fragments in: ``template_fragments`` when configured, else the default."""
+    try:
+        return caches['template_fragments']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def annotate(posts, query=''):
+    """
+    Set ``fragment_version`` on each post, for the ``post_card`` keys in the list template,
+    and prefetch tags only for the cards that are not cached, so a page whose cards are all
+    cached reads no tags. ``query`` is the template's last vary-on value.
+    """
+    posts = list(posts)
+    current = versions(POST, [post.pk for post in posts])
+    for post in posts:
+        post.fragment_version = current[post.pk]
+    keys = {make_template_fragment_key('post_card', [post.pk, post.fragment_version, query]): post for post in posts}
+    cached = fragment_cache().get_many(keys)
+    prefetch_related_objects([post for key, post in keys.items() if key not in cached], 'tags')
+    return posts
@@ -0,0 +1,150 @@
+"""
+Profile picture thumbnails.
+
+When a profile's ``profile_picture`` changes, the original is resized to each of
+``PROFILE_THUMBNAIL_SIZES`` and saved as WebP next to it. The work runs in a
+process pool after the transaction commits, so the upload request does not wait
+for Pillow; until it finishes, ``thumbnail_urls()`` falls back to the original.
+Set ``IMAGE_PROCESSING_ASYNC = False`` to resize inline (tests, scripts).
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+    return _executor
+
+
+def thumbnail_name(name, size):
+    root, _ = os.path.splitext(name)
+    directory, filename = os.path.split(root)
+    return os.path.join(directory, 'thumbs', f'{filename}_{size}.webp')
+
+
+def render_thumbnails(source_path, media_root, source_name, sizes, quality):
+    """
+    Resize ``source_path`` to each size (longest edge, aspect kept) and write WebP files.
+    Runs in a worker process, so it only touches the filesystem, never Django.
+    """
+    from PIL import Image, ImageOps
+
+    names = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+        for label, size in sizes.items():
+            name = thumbnail_name(source_name, size)
+            path = os.path.join(media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.LANCZOS)
+            thumbnail.save(path, 'WEBP', quality=quality)
+            names[label] = name
+    return names
+
+
+def _store(instance, source_name, names):
+    """
+    Record generated thumbnails on the row and on ``instance``, unless the picture changed
+    again meanwhile, then delete the thumbnails of the picture they replace.
+    """
+    model = type(instance)
+    thumbnails = {'source': source_name, **names}
+    rows = model.objects.filter(pk=instance.pk)
+    with transaction.atomic():
+        previous = rows.select_for_update().values_list('profile_picture_thumbnails', flat=True).first()
+        if not rows.filter(profile_picture=source_name).update(profile_picture_thumbnails=thumbnails):
+            return
+    instance.profile_picture_thumbnails = thumbnails  # So a later save() of it does not write the old names back
+    _delete_replaced(model, previous or {}, thumbnails)
+
+
+def _delete_replaced(model, previous, thumbnails):
+    """Delete the thumbnail files of a replaced picture, unless it is the default or another row still shows it."""
+    field = model._meta.get_field('profile_picture')
+    source = previous.get('source')
+    if source in (None, field.default, thumbnails['source']) or model.objects.filter(profile_picture=source).exists():
+        return
+    for label, name in previous.items():
+        if label != 'source' and name not in thumbnails.values():
+            field.storage.delete(name)
+
+
+def _on_done(instance, source_name, future):
+    try:
+        names = future.result()
+    except Exception:
+        logger.exception("Could not build thumbnails for %s", source_name)
+        return
+    try:
+        _store(instance, source_name, names)
+    finally:
+        close_old_connections()  # Runs on the executor's callback thread, which owns its own connection
+
+
+def _submit(instance, source_name, source_path):
+    args = (source_path, str(settings.MEDIA_ROOT), source_name, settings.PROFILE_THUMBNAIL_SIZES, settings.PROFILE_THUMBNAIL_QUALITY)
+    if not settings.IMAGE_PROCESSING_ASYNC:
+        try:
+            names = render_thumbnails(*args)
+        except Exception:
+            logger.exception("Could not build thumbnails for %s", source_name)
+            return
+        _store(instance, source_name, names)
+        return
+    future = get_executor().submit(render_thumbnails, *args)
+    future.add_done_callback(partial(_on_done, instance, source_name))
+
+
+def _reuse_default(instance, picture):
+    """Every new profile starts with the same default picture: render its thumbnails only once."""
+    field = type(instance)._meta.get_field('profile_picture')
+    names = {label: thumbnail_name(picture.name, size) for label, size in settings.PROFILE_THUMBNAIL_SIZES.items()}
+    if picture.name != field.default or not all(picture.storage.exists(name) for name in names.values()):
+        return False
+    _store(instance, picture.name, names)
+    return True
+
+
+def schedule_thumbnails(instance):
+    """Queue thumbnail generation if ``instance.profile_picture`` is new."""
+    picture = instance.profile_picture
+    if not picture or instance.profile_picture_thumbnails.get('source') == picture.name:
+        return
+    if _reuse_default(instance, picture):
+        return
+    try:
+        source_path = picture.storage.path(picture.name)
+    except NotImplementedError:
+        logger.warning("Thumbnails need a local storage backend; skipping %s", picture.name)
+        return
+    submit = partial(_submit, instance, picture.name, source_path)
+    if settings.IMAGE_PROCESSING_ASYNC:
+        transaction.on_commit(submit)
+    else:
+        submit()
+
+
+def thumbnail_urls(instance):
+    """{size label: URL}, falling back to the original image until thumbnails exist."""
+    picture = instance.profile_picture
+    if not picture:
+        return {}
+    names = instance.profile_picture_thumbnails
+    if names.get('source') != picture.name:
+        names = {}
+    return {
+        label: picture.storage.url(names[label]) if label in names else picture.url
+        for label in settings.PROFILE_THUMBNAIL_SIZES
+    }
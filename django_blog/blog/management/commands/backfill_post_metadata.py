@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post, content_metadata
+
+
+class Command(BaseCommand):
+    help = "Fill Post.excerpt, word_count and reading_time from content, in chunks (e.g. after adding the fields)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts read and updated per chunk.")
+        parser.add_argument('--all', action='store_true', help="Recompute every post, not only those never filled.")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk').only('pk', 'content')
+        if not options['all']:
+            posts = posts.filter(word_count=0)
+        last_pk, updated = 0, 0
+        while True:
+            # Walk the primary key instead of OFFSET so every chunk costs the same
+            batch = list(posts.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                for field, value in content_metadata(post.content).items():
+                    setattr(post, field, value)
+            Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+            last_pk, updated = batch[-1].pk, updated + len(batch)
+            self.stdout.write(f"Updated {updated} posts", ending='\r')
+        self.stdout.write(f"Updated {updated} posts")
@@ -0,0 +1,63 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from blog.models import Post
+from blog.search import index_posts, search
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time blog searches against synthetic corpora of increasing size, comparing the inverted index "
+        "with the old icontains scan. Everything is written in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Corpus sizes (posts).")
+        parser.add_argument('--queries', type=int, default=20, help="Queries timed per corpus size.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [f'word{i}' for i in range(5000)]
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like, as in real text
+        self.stdout.write(f"{'posts':>8} {'index ms':>10} {'icontains ms':>14} {'hits':>6}")
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    author = User.objects.create(username='search-benchmark')
+                    posts = Post.objects.bulk_create(
+                        Post(
+                            author=author,
+                            title=' '.join(rng.choices(vocabulary, weights, k=6)),
+                            content=' '.join(rng.choices(vocabulary, weights, k=200)),
+                        )
+                        for _ in range(size)
+                    )
+                    index_posts(Post.objects.filter(pk__in=[post.pk for post in posts]).prefetch_related('tags'))
+                    queries = rng.choices(vocabulary[100:], k=options['queries'])  # Skip near-stop-word terms
+                    indexed, hits = self.time(lambda query: search(query)[:10], queries)
+                    scanned, _ = self.time(self.scan, queries)
+                    self.stdout.write(f"{size:>8} {indexed:>10.2f} {scanned:>14.2f} {hits:>6}")
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def time(self, run, queries):
+        hits, started = 0, time.perf_counter()
+        for query in queries:
+            hits += len(run(query))
+        return (time.perf_counter() - started) * 1000 / len(queries), hits // len(queries)
+
+    def scan(self, query):
+        # What PostSearchView used to do: scan every post and render every match
+        return list(Post.objects.filter(
+            Q(title__icontains=query) | Q(content__icontains=query) | Q(tags__name__icontains=query)
+        ).distinct())
@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from blog.models import Suggestion
+from blog.suggest import suggest, suggestion_index
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time uncached search-box suggestions against a synthetic table of titles and fail if the 95th "
+        "percentile is over budget. Everything is written in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=5000, help="Post titles in the synthetic table.")
+        parser.add_argument('--queries', type=int, default=100, help="Uncached suggestion requests timed.")
+        parser.add_argument('--budget-ms', type=float, default=10, help="Largest acceptable p95, in milliseconds.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        syllables = ['dja', 'ngo', 'py', 'thon', 'da', 'ta', 'ba', 'se', 'cache', 'que', 'ry', 'in', 'dex', 'tag']
+        start = (Suggestion.objects.order_by('-object_id').values_list('object_id', flat=True).first() or 0) + 1
+        try:
+            with transaction.atomic():
+                Suggestion.objects.bulk_create(
+                    Suggestion(
+                        kind=Suggestion.POST, object_id=start + i,
+                        label=' '.join(''.join(rng.choices(syllables, k=rng.randint(1, 3))) for _ in range(5)),
+                    )
+                    for i in range(options['titles'])
+                )
+                suggestion_index.invalidate()
+                suggest('warm up')  # Loads the index, once per process in production
+                timings = []
+                for _ in range(options['queries']):
+                    query = rng.choice(syllables)[:rng.randint(1, 4)]
+                    suggestion_index.answers.clear()
+                    started = time.perf_counter()
+                    suggest(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            suggestion_index.invalidate()  # Forget the rolled-back titles
+
+        timings.sort()
+        p95, median = timings[int(len(timings) * 0.95)], timings[len(timings) // 2]
+        self.stdout.write(f"{options['titles']} titles: p95 {p95:.2f} ms, median {median:.2f} ms")
+        if p95 > options['budget_ms']:
+            raise CommandError(f"p95 {p95:.2f} ms is over the {options['budget_ms']:g} ms budget")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post
+from blog.search import index_posts, rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the blog search index (blog/search.py) from every post, e.g. after a bulk import."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts indexed per transaction.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(post_ids), batch_size):
+            batch = post_ids[start:start + batch_size]
+            index_posts(Post.objects.filter(pk__in=batch).prefetch_related('tags'))
+        rebuild_stats()  # Totals drift if the index was changed behind the signals
+        self.stdout.write(f"Indexed {len(post_ids)} posts")
@@ -0,0 +1,77 @@
+"""
+Full-page cache for anonymous readers.
+
+``AnonymousPageCacheMiddleware`` stores the complete response of the views in
+``BLOG_PAGE_CACHE_VIEWS`` for visitors who are not logged in, with an ETag,
+and answers conditional GETs with 304 Not Modified. There is no Last-Modified:
+a page is built from its post, tags and comments, and no single timestamp
+covers them all. Logged-in
+users always get a freshly rendered page (it carries their own links and CSRF
+token).
+
+Entries are keyed on the versions in blog/fragments.py, so purging is
+targeted: a post detail page moves to a new key when that post, its tags or its
+comments change, and the list and tag pages when any post or tagging changes.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers, set_response_etag
+from . import fragments
+
+
+def page_versions(match):
+    """The fragment versions a page is built from, or None for views that are never cached."""
+    if match.view_name not in settings.BLOG_PAGE_CACHE_VIEWS:
+        return None
+    if 'pk' in match.kwargs:
+        post_id = match.kwargs['pk']
+        return [fragments.version(fragments.POST, post_id), fragments.version(fragments.COMMENTS, post_id)]
+    return [fragments.version(fragments.LISTS, fragments.ALL)]
+
+
+def page_key(request, versions):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"blog:page:{url}:{':'.join(map(str, versions))}"
+
+
+class AnonymousPageCacheMiddleware:
+    """Goes after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if key and self.cacheable(request, response):
+            set_response_etag(response)
+            patch_vary_headers(response, ['Cookie'])
+            cache.set(key, response, settings.BLOG_PAGE_CACHE_TIMEOUT)
+            response = self.conditional(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return None
+        versions = page_versions(request.resolver_match)
+        if versions is None:
+            return None
+        key = page_key(request, versions)
+        response = cache.get(key)
+        if response is None:
+            request._page_cache_key = key  # Rendered by the view below, stored on the way out
+            return None
+        return self.conditional(request, response)
+
+    def cacheable(self, request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies  # E.g. a CSRF cookie: the page is not the same for everyone
+            and not request.user.is_authenticated  # Logged in by the view itself
+        )
+
+    def conditional(self, request, response):
+        return get_conditional_response(request, etag=response.get('ETag'), response=response)
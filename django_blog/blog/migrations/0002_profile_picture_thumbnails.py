@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_picture_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
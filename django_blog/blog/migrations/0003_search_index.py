@@ -0,0 +1,100 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:56
+
+import re
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of blog/search.py's analysis as of this migration, so later changes there cannot change what it does
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it its of on or that the this to was were will with'.split()
+)
+SUFFIXES = (
+    ('sses', 'ss'), ('ies', 'y'), ('ingly', ''), ('edly', ''), ('ness', ''),
+    ('ing', ''), ('ed', ''), ('ly', ''), ('ss', 'ss'), ('s', ''),
+)
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+MAX_TERM_LENGTH = 64
+
+
+def stem(word):
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+        word = word[:-1]
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    return [
+        stem(word)[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall((text or '').lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def document_terms(title, content, tag_names):
+    terms = Counter(analyze(content))
+    for term in analyze(title):
+        terms[term] += TITLE_WEIGHT
+    for term in analyze(' '.join(tag_names)):
+        terms[term] += TAG_WEIGHT
+    return terms
+
+
+def index_existing_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    SearchDocument = apps.get_model('blog', 'SearchDocument')
+    Posting = apps.get_model('blog', 'Posting')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    tag_names = defaultdict(list)
+    tagged = TaggedItem.objects.filter(content_type__app_label='blog', content_type__model='post')
+    for post_id, name in tagged.values_list('object_id', 'tag__name'):
+        tag_names[post_id].append(name)
+    for post in Post.objects.only('id', 'title', 'content').iterator():
+        terms = document_terms(post.title, post.content, tag_names[post.pk])
+        SearchDocument.objects.create(post_id=post.pk, length=sum(terms.values()))
+        Posting.objects.bulk_create(
+            Posting(term=term, document_id=post.pk, frequency=frequency) for term, frequency in terms.items()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_profile_picture_thumbnails'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='blog.post')),
+                ('length', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.PositiveIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='blog.searchdocument')),
+            ],
+            options={
+                'unique_together': {('term', 'document')},
+            },
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
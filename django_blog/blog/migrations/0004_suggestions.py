@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:04
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_suggestions(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Tag = apps.get_model('taggit', 'Tag')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    Suggestion = apps.get_model('blog', 'Suggestion')
+
+    usage = dict(
+        TaggedItem.objects.filter(content_type__app_label='blog', content_type__model='post')
+        .values_list('tag').annotate(posts=Count('pk')).order_by()
+    )
+    Suggestion.objects.bulk_create(
+        Suggestion(kind='post', object_id=pk, label=title)
+        for pk, title in Post.objects.values_list('pk', 'title').iterator()
+    )
+    Suggestion.objects.bulk_create(
+        Suggestion(
+            kind='tag', object_id=pk, label=name, slug=slug, weight=usage.get(pk, 0),
+        )
+        for pk, name, slug in Tag.objects.values_list('pk', 'name', 'slug').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_search_index'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('tag', 'Tag')], max_length=4)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('label', models.CharField(max_length=200)),
+                ('slug', models.SlugField(blank=True, db_index=False, max_length=100)),
+                ('weight', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(fill_suggestions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:24
+
+import django.db.models.deletion
+import taggit.managers
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def post_tagged_items(apps):
+    return apps.get_model('taggit', 'TaggedItem').objects.filter(content_type__app_label='blog', content_type__model='post')
+
+
+def move_tags(apps, schema_editor):
+    """Copy post tags out of taggit's generic table, then count them."""
+    TaggedPost = apps.get_model('blog', 'TaggedPost')
+    TagStats = apps.get_model('blog', 'TagStats')
+    items = post_tagged_items(apps)
+    TaggedPost.objects.bulk_create(
+        (TaggedPost(content_object_id=post_id, tag_id=tag_id) for post_id, tag_id in items.values_list('object_id', 'tag_id').iterator()),
+        batch_size=1000,
+    )
+    items.delete()
+    TagStats.objects.bulk_create(
+        TagStats(tag_id=tag_id, post_count=posts, last_used=last_used)
+        for tag_id, posts, last_used in TaggedPost.objects.values_list('tag').annotate(
+            posts=Count('pk'), last_used=Max('content_object__published_date'),
+        ).order_by()
+    )
+
+
+def restore_tags(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TaggedPost = apps.get_model('blog', 'TaggedPost')
+    content_type, _ = ContentType.objects.get_or_create(app_label='blog', model='post')
+    TaggedItem.objects.bulk_create(
+        (TaggedItem(content_type=content_type, object_id=post_id, tag_id=tag_id) for post_id, tag_id in TaggedPost.objects.values_list('content_object_id', 'tag_id').iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_comment_threads'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaggedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_object', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_items', to='blog.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(app_label)s_%(class)s_items', to='taggit.tag')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='tags',
+            field=taggit.managers.TaggableManager(help_text='A comma-separated list of tags.', through='blog.TaggedPost', to='taggit.Tag', verbose_name='Tags'),
+        ),
+        migrations.CreateModel(
+            name='TagStats',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count'], name='tagstats_post_count_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='taggedpost',
+            index=models.Index(fields=['tag', 'content_object'], name='taggedpost_tag_post_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taggedpost',
+            unique_together={('content_object', 'tag')},
+        ),
+        migrations.RunPython(move_tags, restore_tags),
+    ]
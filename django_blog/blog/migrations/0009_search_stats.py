@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:03
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def count_index(apps, schema_editor):
+    SearchDocument = apps.get_model('blog', 'SearchDocument')
+    Posting = apps.get_model('blog', 'Posting')
+    SearchStats = apps.get_model('blog', 'SearchStats')
+    SearchTerm = apps.get_model('blog', 'SearchTerm')
+    totals = SearchDocument.objects.aggregate(documents=Count('pk'), length=Sum('length'))
+    SearchStats.objects.create(pk=1, documents=totals['documents'], total_length=totals['length'] or 0)
+    counts = Posting.objects.values('term').annotate(documents=Count('pk')).values_list('term', 'documents')
+    SearchTerm.objects.bulk_create(
+        (SearchTerm(term=term, documents=documents) for term, documents in counts.iterator()), batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_tag_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('documents', models.PositiveIntegerField(default=0)),
+                ('total_length', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('term', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('documents', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['term', '-frequency'], name='posting_term_frequency_idx'),
+        ),
+        migrations.RunPython(count_index, migrations.RunPython.noop),
+    ]
@@ -1,29 +1,95 @@
+import math
+
+from django.conf import settings
 from django.db import models
 from django.urls import reverse
+from django.utils.text import Truncator
 from django.contrib.auth.models import User
 from django.utils import timezone
 from taggit.managers import TaggableManager
+from taggit.models import Tag, TaggedItemBase
+from .images import thumbnail_urls
 
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True, default='default.jpg')
+    profile_picture_thumbnails = models.JSONField(default=dict, blank=True, editable=False)  # Filled by blog/images.py
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @property
+    def thumbnails(self):
+        """{size label: URL} of the WebP thumbnails, e.g. ``profile.thumbnails.medium`` in templates."""
+        return thumbnail_urls(self)
+
+
+def content_metadata(content):
+    """The stored excerpt, word count and reading time (minutes) for a post body."""
+    word_count = len(content.split())
+    return {
+        'excerpt': Truncator(content).words(settings.BLOG_EXCERPT_WORDS),
+        'word_count': word_count,
+        'reading_time': max(1, math.ceil(word_count / settings.BLOG_WORDS_PER_MINUTE)),
+    }
+
+
+class TaggedPost(TaggedItemBase):
+    """Post tags with a real foreign key, so tag listings join on an index instead of a generic relation."""
+    content_object = models.ForeignKey('Post', on_delete=models.CASCADE, related_name='tagged_items')
+
+    class Meta:
+        unique_together = ['content_object', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='taggedpost_tag_post_idx'),  # Posts for a tag
+        ]
+
+
+class TagStats(models.Model):
+    """How many posts carry a tag and when it was last added, kept current by blog/signals.py (blog/tags.py)."""
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count'], name='tagstats_post_count_idx'),  # The tag cloud
+        ]
+
+    def __str__(self):
+        return f"{self.tag}: {self.post_count} posts"
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
-    tags = TaggableManager()
+    tags = TaggableManager(through=TaggedPost)
+    # Derived from content on save so list pages never load the body (backfill: manage.py backfill_post_metadata)
+    excerpt = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(default=1, editable=False)  # Minutes
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-published_date', '-id'], name='post_published_id_idx'),  # List pages, newest first
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            for field, value in content_metadata(self.content).items():
+                setattr(self, field, value)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt', 'word_count', 'reading_time'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post-detail', kwargs={'pk': self.pk})
 
@@ -33,10 +99,99 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Materialized path: the zero-padded ids of every ancestor and this comment, e.g. "0000000012/0000000034/".
+    # Ordering a post's comments by path lists each thread depth-first (see blog/comments.py).
+    path = models.CharField(max_length=255, editable=False, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_thread_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.path:  # The path needs our id, so it is written right after the insert
+            self.path = (self.parent.path if self.parent_id else '') + f'{self.pk:010d}/'
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    @property
+    def depth(self):
+        """0 for a top-level comment, 1 for a reply, and so on."""
+        return self.path.count('/') - 1
+
     # Optional: Add get_absolute_url method to redirect to the post detail page after commenting
     def get_absolute_url(self):
         return reverse('blog:post-detail', kwargs={'pk': self.post.pk})
+
+
+class SearchDocument(models.Model):
+    """A post's entry in the search index (blog/search.py): its length in indexed terms, for BM25."""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Search document for {self.post}"
+
+
+class Posting(models.Model):
+    """One row of the inverted index: how often a stemmed term occurs in a post (title and tags weighted)."""
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['term', 'document']  # Also the term -> documents lookup index
+        indexes = [
+            models.Index(fields=['term', '-frequency'], name='posting_term_frequency_idx'),  # Best postings of a term first
+        ]
+
+    def __str__(self):
+        return f"{self.term} in {self.document_id}"
+
+
+class SearchTerm(models.Model):
+    """A term of the search index and how many posts contain it (BM25's document frequency)."""
+    term = models.CharField(max_length=64, primary_key=True)
+    documents = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.term} in {self.documents} posts"
+
+
+class SearchStats(models.Model):
+    """
+    Totals over the whole search index for BM25: one row, moved by blog/search.py
+    as posts are indexed and removed, so a search never aggregates every document.
+    """
+    documents = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.documents} indexed posts"
+
+
+class Suggestion(models.Model):
+    """
+    A search-box suggestion (a post title or a tag name). This small table is what
+    blog/suggest.py loads its in-memory prefix index from, so suggestions never read posts.
+    """
+    POST = 'post'
+    TAG = 'tag'
+    KIND_CHOICES = [(POST, 'Post'), (TAG, 'Tag')]
+
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    label = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=100, blank=True, db_index=False)  # Tags only; URLs are reversed when the index loads
+    weight = models.PositiveIntegerField(default=0)  # Posts using the tag; ranks popular tags first
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+
+    def __str__(self):
+        return f"{self.label} ({self.kind})"
+
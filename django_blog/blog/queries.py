@@ -0,0 +1,49 @@
+"""
+Querysets shared by the post list pages (home, search, posts by tag).
+
+Everything a list row shows is fetched up front: the author is joined, tags
+are prefetched in one extra query for the cards that are not cached
+(``fragments.annotate``), and the article body is left in the database (rows
+show the stored ``Post.excerpt``), so rendering a page costs the same however
+many posts the blog holds.
+"""
+import base64
+import json
+
+from django.utils.dateparse import parse_datetime
+from .models import Post
+
+ORDERING = ('-published_date', '-pk')  # Newest first; pk breaks ties for keyset pagination
+
+
+def list_posts(queryset=None, content=False):
+    """
+    ``queryset`` (default: all posts) ready for a list template. Without ``content``,
+    the body is not loaded at all.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    queryset = queryset.select_related('author')
+    if not content:
+        queryset = queryset.defer('content')
+    return queryset
+
+
+def encode_cursor(post):
+    position = [post.published_date.isoformat(), post.pk]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(published_date, pk) from a cursor, or None if it is malformed."""
+    try:
+        published_date, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        published_date = parse_datetime(published_date)
+        return (published_date, int(pk)) if published_date else None
+    except (TypeError, ValueError, UnicodeError):
+        return None
+
+
+def posts_after(queryset, cursor):
+    """Rows of ``queryset`` (in ``ORDERING``) that come after ``cursor``: an index range, not an OFFSET."""
+    published_date, pk = cursor
+    return queryset.filter(published_date__lte=published_date).exclude(published_date=published_date, pk__gte=pk)
@@ -0,0 +1,229 @@
+"""
+Full-text search for blog posts.
+
+Posts are analyzed into stemmed terms (``analyze``) and stored in an inverted
+index: one ``Posting`` row per (term, post) with the term's frequency, title
+and tag terms counting extra. The index is kept current by the receivers in
+blog/signals.py, so a search reads only the postings for the query terms and
+ranks the matching posts with BM25, instead of scanning every post's text.
+
+The corpus totals BM25 needs (post count and total length in ``SearchStats``,
+each term's document count in ``SearchTerm``) are moved by ``index_posts`` and
+``remove_post`` as they go, and a term's postings are read best first up to
+BLOG_SEARCH_POSTINGS_PER_TERM, so a query costs the same however large the
+blog grows. Rebuild it all with ``manage.py rebuild_search_index``.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import Posting, SearchDocument, SearchStats, SearchTerm
+from .queries import list_posts
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it its of on or that the this to was were will with'.split()
+)
+SUFFIXES = (  # Longest first; the first match is stripped
+    ('sses', 'ss'), ('ies', 'y'), ('ingly', ''), ('edly', ''), ('ness', ''),
+    ('ing', ''), ('ed', ''), ('ly', ''), ('ss', 'ss'), ('s', ''),
+)
+TITLE_WEIGHT = 3  # A title word counts as much as three content words
+TAG_WEIGHT = 2
+K1 = 1.2  # BM25 term-frequency saturation
+B = 0.75  # BM25 document-length normalization
+SNIPPET_WORDS = 30
+MAX_TERM_LENGTH = 64
+STATS_ID = 1
+
+
+def stem(word):
+    """A light suffix stripper: 'searching', 'searched' and 'searches' all become 'search'."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+        word = word[:-1]  # running -> runn -> run
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]  # like/liked/likes all end up as 'lik'
+    return word
+
+
+def analyze(text):
+    """Lowercased, stemmed terms of ``text`` with stop words removed."""
+    return [
+        stem(word)[:MAX_TERM_LENGTH]
+        for word in WORD_RE.findall((text or '').lower())
+        if word not in STOP_WORDS
+    ]
+
+
+def document_terms(title, content, tag_names):
+    """{term: weighted frequency} for one post."""
+    terms = Counter(analyze(content))
+    for term in analyze(title):
+        terms[term] += TITLE_WEIGHT
+    for term in analyze(' '.join(tag_names)):
+        terms[term] += TAG_WEIGHT
+    return terms
+
+
+def index_posts(posts):
+    """(Re)index ``posts``, each with its tags prefetched or fetched, in one transaction."""
+    documents, postings = [], []
+    for post in posts:
+        terms = document_terms(post.title, post.content, [tag.name for tag in post.tags.all()])
+        documents.append(SearchDocument(post_id=post.pk, length=sum(terms.values())))
+        postings.extend(
+            Posting(term=term, document_id=post.pk, frequency=frequency) for term, frequency in terms.items()
+        )
+    with transaction.atomic():
+        post_ids = [document.post_id for document in documents]
+        old = SearchDocument.objects.filter(post__in=post_ids).aggregate(documents=Count('pk'), length=Sum('length'))
+        term_counts = Counter(posting.term for posting in postings)
+        term_counts.subtract(Posting.objects.filter(document__in=post_ids).values_list('term', flat=True))
+        Posting.objects.filter(document__in=post_ids).delete()
+        SearchDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['post'], update_fields=['length'],
+        )
+        Posting.objects.bulk_create(postings, batch_size=1000)
+        adjust_stats(
+            len(documents) - old['documents'],
+            sum(document.length for document in documents) - (old['length'] or 0),
+            term_counts,
+        )
+
+
+def index_post(post):
+    index_posts([post])
+
+
+def remove_post(post_id):
+    """Take a post that is about to be deleted out of the totals (its index rows cascade)."""
+    length = SearchDocument.objects.filter(post=post_id).values_list('length', flat=True).first()
+    if length is None:
+        return
+    terms = Counter()
+    terms.subtract(Posting.objects.filter(document=post_id).values_list('term', flat=True))
+    adjust_stats(-1, -length, terms)
+
+
+def adjust_stats(documents, length, terms):
+    """Move the corpus totals by ``documents`` posts and ``length`` terms, and each term's post count by ``terms[term]``."""
+    if documents or length:
+        totals = SearchStats.objects.filter(pk=STATS_ID)
+        if not totals.update(documents=F('documents') + documents, total_length=F('total_length') + length):
+            SearchStats.objects.get_or_create(pk=STATS_ID)
+            totals.update(documents=F('documents') + documents, total_length=F('total_length') + length)
+    terms = {term: change for term, change in terms.items() if change}
+    if not terms:
+        return
+    current = dict(SearchTerm.objects.select_for_update().filter(term__in=terms).values_list('term', 'documents'))
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=term, documents=max(0, current.get(term, 0) + change)) for term, change in terms.items()],
+        update_conflicts=True, unique_fields=['term'], update_fields=['documents'], batch_size=1000,
+    )
+
+
+def rebuild_stats():
+    """Recount the totals and every term's post count from the index itself, e.g. after a rebuild."""
+    with transaction.atomic():
+        totals = SearchDocument.objects.aggregate(documents=Count('pk'), length=Sum('length'))
+        SearchStats.objects.update_or_create(
+            pk=STATS_ID, defaults={'documents': totals['documents'], 'total_length': totals['length'] or 0},
+        )
+        SearchTerm.objects.all().delete()
+        counts = Posting.objects.values('term').annotate(documents=Count('pk')).values_list('term', 'documents')
+        SearchTerm.objects.bulk_create(
+            (SearchTerm(term=term, documents=documents) for term, documents in counts.iterator()), batch_size=1000,
+        )
+
+
+class SearchResults:
+    """
+    Ranked search hits that load posts only for the slice being displayed, so a
+    ``Paginator`` over them costs one query for the page, not one per match.
+    Each loaded post gets ``search_score``, ``highlighted_title`` and ``snippet``.
+    """
+
+    def __init__(self, hits, terms):
+        self.hits = hits  # [(post id, score)], best first
+        self.terms = terms
+
+    def __len__(self):
+        return len(self.hits)
+
+    def count(self):
+        return len(self.hits)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        hits = self.hits[index]
+        posts = list_posts(content=True).in_bulk([post_id for post_id, _ in hits])  # Snippets need the body
+        page = []
+        for post_id, score in hits:
+            post = posts.get(post_id)
+            if post is None:
+                continue  # Deleted since the search ran
+            post.search_score = score
+            post.highlighted_title = highlight(post.title, self.terms, length=None)
+            post.snippet = highlight(post.content, self.terms)
+            page.append(post)
+        return page
+
+
+def search(query):
+    """BM25-ranked ``SearchResults`` for the posts matching any term of ``query``."""
+    terms = set(analyze(query))
+    if not terms:
+        return SearchResults([], terms)
+    document_frequency = dict(SearchTerm.objects.filter(term__in=terms, documents__gt=0).values_list('term', 'documents'))
+    stats = SearchStats.objects.filter(pk=STATS_ID).first()
+    if not document_frequency or stats is None or not stats.documents:
+        return SearchResults([], terms)
+    total, average_length = stats.documents, stats.total_length / stats.documents or 1
+    postings = []
+    for term in document_frequency:  # Best postings first: a common term costs no more than a rare one
+        postings += (
+            Posting.objects.filter(term=term).order_by('-frequency', 'document')
+            .values_list('term', 'document', 'frequency', 'document__length')[:settings.BLOG_SEARCH_POSTINGS_PER_TERM]
+        )
+
+    scores = Counter()
+    for term, post_id, frequency, length in postings:
+        df = document_frequency[term]
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        scores[post_id] += idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+    hits = sorted(scores.items(), key=lambda hit: (-hit[1], -hit[0]))
+    return SearchResults(hits, terms)
+
+
+def highlight(text, terms, length=SNIPPET_WORDS):
+    """
+    HTML-escaped ``text`` with words matching ``terms`` wrapped in <mark>.
+    With a ``length``, only a window of that many words around the first match is kept.
+    """
+    words = (text or '').split()
+    matches = [
+        i for i, word in enumerate(words)
+        if any(stem(token) in terms for token in WORD_RE.findall(word.lower()))
+    ]
+    start, end = 0, len(words)
+    if length is not None:
+        start = max(0, min(matches[0] - length // 3, len(words) - length)) if matches else 0
+        end = start + length
+    matched = set(matches)
+    html = ' '.join(
+        f'<mark>{escape(word)}</mark>' if i in matched else escape(word)
+        for i, word in enumerate(words[start:end], start)
+    )
+    return mark_safe(('… ' if start else '') + html + (' …' if end < len(words) else ''))
@@ -1,10 +1,96 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from taggit.models import Tag
+from .models import Comment, Profile, Post, TaggedPost
+from .images import schedule_thumbnails
+from .search import index_post, index_posts, remove_post
+from . import fragments, suggest, tags
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
     """Creates a Profile automatically when a new User is created."""
     if created:
         Profile.objects.create(user=instance)
+
+@receiver(post_save, sender=Profile)
+def build_profile_thumbnails(sender, instance, **kwargs):
+    """Resizes a newly uploaded profile picture in the background."""
+    schedule_thumbnails(instance)
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    """Reindexes a post's title and content and refreshes its title suggestion (the index cascades on delete)."""
+    index_post(instance)
+    suggest.store_post(instance)
+
+@receiver(pre_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    """Takes the post out of the search totals while its index rows still exist (they cascade)."""
+    remove_post(instance.pk)
+
+@receiver(post_delete, sender=Post)
+def discard_post_suggestion(sender, instance, **kwargs):
+    suggest.discard(suggest.Suggestion.POST, instance.pk)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_retagged_post(sender, instance, action, **kwargs):
+    """Reindexes a post when tags are added, removed or cleared (taggit sends m2m_changed)."""
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Post):
+        index_post(instance)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reweigh_tag_suggestions(sender, instance, action, pk_set, **kwargs):
+    """Keeps tag suggestions ranked by how many posts use them."""
+    if not isinstance(instance, Post):
+        return
+    if action == 'pre_clear':
+        instance._cleared_tag_ids = list(instance.tags.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        suggest.update_tag_weights(pk_set)
+    elif action == 'post_clear':
+        suggest.update_tag_weights(getattr(instance, '_cleared_tag_ids', []))
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag(sender, instance, created, **kwargs):
+    """Refreshes a tag's suggestion, and reindexes the posts carrying it when it is renamed."""
+    if not created:
+        posts = list(Post.objects.filter(tags=instance).prefetch_related('tags'))
+        index_posts(posts)
+        fragments.bump(fragments.POST, *(post.pk for post in posts))
+        fragments.bump(fragments.LISTS, fragments.ALL)
+        tags.expire_cloud()
+    suggest.store_tag(instance)
+
+@receiver(post_delete, sender=Tag)
+def discard_tag_suggestion(sender, instance, **kwargs):
+    suggest.discard(suggest.Suggestion.TAG, instance.pk)
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_fragments(sender, instance, **kwargs):
+    """Moves a post's cached body, tags and list card, and the cached list pages, to new keys (blog/fragments.py)."""
+    fragments.bump(fragments.POST, instance.pk)
+    fragments.bump(fragments.LISTS, fragments.ALL)
+
+@receiver(post_save, sender=TaggedPost)
+@receiver(post_delete, sender=TaggedPost)
+def expire_tagged_post_fragments(sender, instance, **kwargs):
+    """Tagging and untagging go through the TaggedPost through model, one row per tag."""
+    fragments.bump(fragments.POST, instance.content_object_id)
+    fragments.bump(fragments.LISTS, fragments.ALL)
+
+@receiver(post_save, sender=TaggedPost)
+def count_tag_use(sender, instance, created, **kwargs):
+    """Keeps TagStats current one tagging at a time (blog/tags.py)."""
+    if created:
+        tags.tag_added(instance.tag_id)
+
+@receiver(post_delete, sender=TaggedPost)
+def count_tag_removal(sender, instance, **kwargs):
+    tags.tag_removed(instance.tag_id)
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def expire_comment_fragments(sender, instance, **kwargs):
+    fragments.bump(fragments.COMMENTS, instance.post_id)
@@ -1,4 +1,91 @@
 // Basic example script to demonstrate dynamic behavior
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Blog page loaded');
-});
\ No newline at end of file
+
+    // Search-as-you-type: fill the search box's datalist from the suggestion endpoint
+    document.querySelectorAll('input[data-suggest-url]').forEach(function(input) {
+        var list = document.getElementById(input.getAttribute('list'));
+        var latest = 0;
+        input.addEventListener('input', function() {
+            var request = ++latest;
+            var query = input.value.trim();
+            if (!query) {
+                list.innerHTML = '';
+                return;
+            }
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(query))
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    if (request !== latest) {
+                        return;  // A newer keystroke already asked
+                    }
+                    list.innerHTML = '';
+                    data.suggestions.forEach(function(suggestion) {
+                        var option = document.createElement('option');
+                        option.value = suggestion.label;
+                        list.appendChild(option);
+                    });
+                });
+        });
+    });
+
+    // Threaded comments: "Reply" targets the comment form at a comment, "Load more" appends the next page
+    var commentForm = document.getElementById('comment-form');
+    document.addEventListener('click', function(event) {
+        var replyTo = event.target.getAttribute('data-reply-to');
+        if (replyTo && commentForm) {
+            commentForm.elements.parent.value = replyTo;
+            commentForm.elements.content.focus();
+        }
+    });
+
+    var loadComments = document.getElementById('load-comments');
+    if (loadComments) {
+        loadComments.addEventListener('click', function() {
+            fetch(loadComments.dataset.url)
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    var list = document.getElementById('comments');
+                    data.comments.forEach(function(comment) {
+                        var item = document.createElement('div');
+                        item.className = 'comment';
+                        item.style.marginLeft = comment.depth + 'em';
+                        var meta = document.createElement('p');
+                        var author = document.createElement('strong');
+                        author.textContent = comment.author;
+                        meta.appendChild(author);
+                        meta.appendChild(document.createTextNode(' - ' + comment.created_at.slice(0, 16).replace('T', ' ')));
+                        var content = document.createElement('p');
+                        content.textContent = comment.content;
+                        item.appendChild(meta);
+                        item.appendChild(content);
+                        if (loadComments.dataset.canReply === 'true') {
+                            var reply = document.createElement('button');
+                            reply.type = 'button';
+                            reply.className = 'btn btn-link';
+                            reply.textContent = 'Reply';
+                            reply.setAttribute('data-reply-to', comment.id);
+                            item.appendChild(reply);
+                        }
+                        if (comment.is_author) {
+                            [['Edit', comment.edit_url, 'btn btn-warning'], ['Delete', comment.delete_url, 'btn btn-danger']].forEach(function(action) {
+                                var link = document.createElement('a');
+                                link.textContent = action[0];
+                                link.href = action[1];
+                                link.className = action[2];
+                                item.appendChild(document.createTextNode(' '));
+                                item.appendChild(link);
+                            });
+                        }
+                        item.appendChild(document.createElement('hr'));
+                        list.appendChild(item);
+                    });
+                    if (data.next) {
+                        loadComments.dataset.url = data.next;
+                    } else {
+                        loadComments.remove();
+                    }
+                });
+        });
+    }
+});
@@ -0,0 +1,225 @@
+"""
+Search-as-you-type suggestions for the blog search box.
+
+Post titles and tag names are copied into the small ``Suggestion`` table by
+the receivers in blog/signals.py. Each process loads that table once into an
+in-memory index and answers every keystroke from memory, never from the posts
+table:
+
+* a sorted list of distinct label words, searched with ``bisect`` for word
+  prefixes ("dja pra" finds "Django in practice");
+* trigrams of those words, used as a fallback for typos ("djnago").
+
+Committed writes update the table and this process's index in place and bump
+a version number in the default cache; another process that sees the version
+move reloads its index before answering (with several processes, set CACHE_URL; see blog/checks.py).
+Ranked answers are also kept in a small LRU so repeated prefixes cost nothing.
+"""
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from .models import Suggestion, TagStats
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+VERSION_KEY = 'blog:suggest:version'
+
+
+def normalize(text):
+    """Lowercase words with accents stripped: 'Café Django' -> ['cafe', 'django']."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return WORD_RE.findall(text.lower())
+
+
+def word_grams(word):
+    """Trigrams of a word padded like pg_trgm: 'web' -> {'  w', ' we', 'web', 'eb '}."""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SuggestionIndex:
+    """In-memory prefix and trigram index over the ``Suggestion`` table, with an LRU of answers."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.entries = {}  # (kind, object_id) -> {'kind', 'label', 'url', 'weight', 'words', 'text', 'order'}
+        self.words = []  # Sorted distinct label words, for prefix ranges
+        self.postings = defaultdict(set)  # word -> keys
+        self.grams = defaultdict(set)  # trigram -> keys
+        self.labels = []  # Sorted (normalized label, key), for whole-label prefix ranges
+        self.answers = OrderedDict()  # query -> ranked suggestions
+
+    def load(self, version):
+        self.entries, self.postings, self.grams = {}, defaultdict(set), defaultdict(set)
+        for kind, object_id, label, slug, weight in Suggestion.objects.values_list('kind', 'object_id', 'label', 'slug', 'weight'):
+            entry = {'kind': kind, 'label': label, 'url': suggestion_url(kind, object_id, slug), 'weight': weight}
+            self._add((kind, object_id), entry, sort=False)
+        self.words = sorted(self.postings)
+        self.labels = sorted((entry['text'], key) for key, entry in self.entries.items())
+        self.answers.clear()
+        self.version = version
+
+    def invalidate(self):
+        """Force a reload from the table on next use (e.g. after writing to it directly)."""
+        with self.lock:
+            self.version = None
+
+    def ensure_current(self):
+        version = cache.get(VERSION_KEY, 0)
+        if version != self.version:
+            self.load(version)
+
+    def apply(self, key, entry):
+        """Replace (or with ``entry=None`` remove) one suggestion, then publish the change to other processes."""
+        with self.lock:
+            self.ensure_current()
+            self._remove(key)
+            if entry is not None:
+                self._add(key, entry)
+            self.answers.clear()
+            try:
+                version = cache.incr(VERSION_KEY)
+            except ValueError:  # Not set yet (or evicted)
+                cache.add(VERSION_KEY, 0, timeout=None)
+                version = cache.incr(VERSION_KEY)
+            # Anyone else's write in between means this index missed it: reload on next use
+            self.version = version if version == self.version + 1 else None
+
+    def _add(self, key, entry, sort=True):
+        entry['words'] = words = normalize(entry['label'])
+        entry['text'] = ' '.join(words)
+        entry['order'] = (entry['kind'] != Suggestion.TAG, -entry['weight'], entry['label'].lower())  # Popular tags first
+        self.entries[key] = entry
+        for word in set(words):
+            if sort and word not in self.postings:
+                insort(self.words, word)
+            self.postings[word].add(key)
+            for gram in word_grams(word):
+                self.grams[gram].add(key)
+        if sort:
+            insort(self.labels, (entry['text'], key))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for word in set(entry['words']):
+            self.postings[word].discard(key)
+            if not self.postings[word]:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+            for gram in word_grams(word):
+                self.grams[gram].discard(key)
+        del self.labels[bisect_left(self.labels, (entry['text'], key))]
+
+    def _range(self, prefix):
+        """Positions in ``self.words`` of the words starting with ``prefix``."""
+        return bisect_left(self.words, prefix), bisect_left(self.words, prefix + '\U0010ffff')
+
+    def _prefixed(self, prefix):
+        start, end = self._range(prefix)
+        return set().union(*(self.postings[word] for word in self.words[start:end]))
+
+    def _similar(self, words):
+        """Keys containing at least SUGGEST_MIN_SIMILARITY of the query's trigrams, best first."""
+        grams = set().union(*(word_grams(word) for word in words))
+        shared = Counter(key for gram in grams for key in self.grams.get(gram, ()))
+        needed = len(grams) * settings.SUGGEST_MIN_SIMILARITY
+        return [key for key, count in shared.most_common() if count >= needed]
+
+    def _matching(self, words, phrase, limit):
+        """
+        The best ``limit`` keys whose words start with each of ``words``: labels starting
+        with ``phrase`` first, then popular tags, then alphabetically.
+        """
+        start, end = bisect_left(self.labels, (phrase,)), bisect_left(self.labels, (phrase + '\U0010ffff',))
+        leading = [key for _, key in self.labels[start:end]]  # A contiguous range of the sorted labels
+        best = heapq.nsmallest(limit, leading, key=self._order)
+        if len(best) < limit:
+            others = set.intersection(*(self._prefixed(word) for word in words)).difference(leading)
+            best += heapq.nsmallest(limit - len(best), others, key=self._order)
+        return best
+
+    def _order(self, key):
+        return self.entries[key]['order']
+
+    def search(self, query):
+        words = normalize(query)
+        if not words:
+            return []
+        phrase = ' '.join(words)
+        with self.lock:
+            self.ensure_current()
+            if phrase in self.answers:
+                self.answers.move_to_end(phrase)
+                return self.answers[phrase]
+            ranked = self._matching(words, phrase, settings.SUGGEST_LIMIT)
+            if not ranked and len(phrase) >= 3:
+                ranked = self._similar(words)[:settings.SUGGEST_LIMIT]  # Probably a typo
+            answer = [
+                {name: self.entries[key][name] for name in ('label', 'kind', 'url')}
+                for key in ranked
+            ]
+            self.answers[phrase] = answer
+            while len(self.answers) > settings.SUGGEST_CACHE_SIZE:
+                self.answers.popitem(last=False)
+            return answer
+
+
+def suggestion_url(kind, object_id, slug):
+    if kind == Suggestion.TAG:
+        return reverse('blog:post-by-tag', kwargs={'tag_slug': slug})
+    return reverse('blog:post-detail', kwargs={'pk': object_id})
+
+
+suggestion_index = SuggestionIndex()
+
+
+def suggest(query):
+    """Up to SUGGEST_LIMIT {'label', 'kind', 'url'} dicts for a partly typed ``query``."""
+    return suggestion_index.search(query)
+
+
+def _publish(kind, object_id, suggestion=None):
+    entry = suggestion and {
+        'kind': kind, 'label': suggestion.label, 'url': suggestion_url(kind, object_id, suggestion.slug), 'weight': suggestion.weight,
+    }
+    transaction.on_commit(partial(suggestion_index.apply, (kind, object_id), entry))  # Rolled-back writes never show
+
+
+def store(kind, object_id, label, slug=''):
+    """Create or refresh a suggestion in the table and, once committed, in the index."""
+    suggestion, _ = Suggestion.objects.update_or_create(kind=kind, object_id=object_id, defaults={'label': label, 'slug': slug})
+    _publish(kind, object_id, suggestion)
+
+
+def discard(kind, object_id):
+    Suggestion.objects.filter(kind=kind, object_id=object_id).delete()
+    _publish(kind, object_id)
+
+
+def store_post(post):
+    store(Suggestion.POST, post.pk, post.title)
+
+
+def store_tag(tag):
+    store(Suggestion.TAG, tag.pk, tag.name, tag.slug)
+
+
+def update_tag_weights(tag_ids):
+    """Set each tag suggestion's weight to the number of posts carrying the tag."""
+    counts = dict(TagStats.objects.filter(tag__in=tag_ids).values_list('tag', 'post_count'))  # Counted by blog/tags.py
+    for suggestion in Suggestion.objects.filter(kind=Suggestion.TAG, object_id__in=tag_ids):
+        suggestion.weight = counts.get(suggestion.object_id, 0)
+        suggestion.save(update_fields=['weight'])
+        _publish(Suggestion.TAG, suggestion.object_id, suggestion)
@@ -0,0 +1,95 @@
+"""
+Post tagging, tag statistics and the tag cloud.
+
+``set_post_tags`` is the one way posts get their tags from a list of names
+(the post create/edit views, imports): it diffs against the current tags and
+applies the difference with a single ``remove()`` and a single ``add()``.
+
+``TagStats`` holds each tag's post count and when it was last added to a post.
+The receivers in blog/signals.py adjust it one row at a time as ``TaggedPost``
+rows are created and deleted, so counting never scans the tagging table. The
+tag cloud is built from the most used tags and cached until the next change.
+"""
+import math
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import TagStats
+
+CLOUD_KEY = 'blog:tag-cloud'
+
+
+def tag_diff(current, wanted):
+    """
+    (names to add, names to remove) turning the tag names ``current`` into ``wanted``,
+    ignoring case when TAGGIT_CASE_INSENSITIVE is set. Removals use the current spelling.
+    """
+    fold = str.lower if getattr(settings, 'TAGGIT_CASE_INSENSITIVE', False) else str
+    current = {fold(name): name for name in current}
+    wanted = {fold(name): name for name in wanted}
+    added = [name for key, name in wanted.items() if key not in current]
+    removed = [name for key, name in current.items() if key not in wanted]
+    return added, removed
+
+
+def set_post_tags(post, names):
+    """Give ``post`` exactly the tags ``names``, touching only the ones that change. Returns (added, removed)."""
+    added, removed = tag_diff(post.tags.names(), names)
+    with transaction.atomic():
+        if removed:
+            post.tags.remove(*removed)
+        if added:
+            post.tags.add(*added)
+    return added, removed
+
+
+def tag_added(tag_id):
+    now = timezone.now()
+    if not TagStats.objects.filter(tag=tag_id).update(post_count=F('post_count') + 1, last_used=now):
+        TagStats.objects.get_or_create(tag_id=tag_id)  # First use; a concurrent first use may win the insert
+        TagStats.objects.filter(tag=tag_id).update(post_count=F('post_count') + 1, last_used=now)
+    expire_cloud()
+
+
+def tag_removed(tag_id):
+    TagStats.objects.filter(tag=tag_id, post_count__gt=0).update(post_count=F('post_count') - 1)
+    expire_cloud()
+
+
+def expire_cloud():
+    transaction.on_commit(partial(cache.delete, CLOUD_KEY))
+
+
+def cloud_size(count, smallest, largest):
+    """1 to BLOG_TAG_CLOUD_STEPS, on a log scale between the least and most used tags in the cloud."""
+    steps = settings.BLOG_TAG_CLOUD_STEPS
+    if largest == smallest:
+        return (steps + 1) // 2
+    return 1 + round((steps - 1) * math.log(count / smallest) / math.log(largest / smallest))
+
+
+def tag_cloud():
+    """The BLOG_TAG_CLOUD_SIZE most used tags, alphabetically, as {'name', 'slug', 'post_count', 'last_used', 'size'}."""
+    tags = cache.get(CLOUD_KEY)
+    if tags is None:
+        stats = list(
+            TagStats.objects.filter(post_count__gt=0).select_related('tag')
+            .order_by('-post_count', 'tag__name')[:settings.BLOG_TAG_CLOUD_SIZE]
+        )
+        counts = [row.post_count for row in stats] or [1]
+        tags = sorted(
+            (
+                {
+                    'name': row.tag.name, 'slug': row.tag.slug, 'post_count': row.post_count,
+                    'last_used': row.last_used, 'size': cloud_size(row.post_count, min(counts), max(counts)),
+                }
+                for row in stats
+            ),
+            key=lambda tag: tag['name'].lower(),
+        )
+        cache.set(CLOUD_KEY, tags, settings.BLOG_TAG_CLOUD_TIMEOUT)
+    return tags
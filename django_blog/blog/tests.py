@@ -1,3 +1,514 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .checks import check_shared_cache
+from .models import Comment, Post, Posting, SearchDocument, SearchStats, SearchTerm, Suggestion, TaggedPost, TagStats
+from .search import analyze, search
+from .suggest import suggestion_index
+from .tags import set_post_tags, tag_cloud, tag_diff
 
-# Create your tests here.
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False, PROFILE_THUMBNAIL_SIZES={'small': 32, 'medium': 64})
+class ProfileThumbnailTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        shutil.copy(os.path.join(settings.MEDIA_ROOT, 'default.jpg'), self.media_root)  # Every new profile starts with it
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+        self.user = User.objects.create_user(username='reader', password='testpass')
+
+    def test_uploaded_picture_gets_webp_thumbnails(self):
+        """The profile page shows the medium WebP thumbnail instead of the original upload"""
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), 'blue').save(buffer, 'PNG')
+        profile = self.user.profile
+        profile.profile_picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        profile.save()
+        profile.refresh_from_db()
+
+        medium = profile.profile_picture_thumbnails['medium']
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, medium)))
+        self.client.login(username='reader', password='testpass')
+        self.assertContains(self.client.get(reverse('blog:profile')), medium)
+
+    def test_replacing_a_picture_keeps_the_default_thumbnails(self):
+        """The saved profile sees its new thumbnails; the shared default's files stay for other profiles"""
+        default = dict(self.user.profile.profile_picture_thumbnails)
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), 'blue').save(buffer, 'PNG')
+        profile = self.user.profile
+        profile.profile_picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        profile.save()
+
+        self.assertEqual(profile.profile_picture_thumbnails['source'], profile.profile_picture.name)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, default['medium'])))
+
+
+class PostSearchTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.indexing = Post.objects.create(author=self.author, title='Indexing posts', content='How we searched faster with an inverted index.')
+        self.mention = Post.objects.create(author=self.author, title='Weekend', content='Some notes on indexes and <b>markup</b>.')
+        self.other = Post.objects.create(author=self.author, title='Gardening', content='Tomatoes need sun.')
+
+    def results(self, query, **params):
+        response = self.client.get(reverse('blog:post-search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_stemmed_terms_ranked_by_bm25(self):
+        """'index' matches 'Indexing', 'index' and 'indexes'; the title match ranks first"""
+        self.assertEqual(analyze('Searching searched searches'), ['search'] * 3)
+        posts = self.results('index').context['posts']
+        self.assertEqual(posts, [self.indexing, self.mention])
+        self.assertGreater(posts[0].search_score, posts[1].search_score)
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        response = self.results('indexes')
+        self.assertContains(response, '<mark>indexes</mark>')
+        self.assertContains(response, '&lt;b&gt;markup&lt;/b&gt;')
+        self.assertNotContains(response, 'Gardening')
+
+    def test_index_follows_edits_tags_and_deletes(self):
+        self.other.tags.add('Search')
+        self.assertIn(self.other, self.results('search').context['posts'])
+        self.other.tags.remove('Search')
+        self.assertNotIn(self.other, self.results('search').context['posts'])
+
+        self.other.content = 'Tomatoes and an index card.'
+        self.other.save()
+        self.assertIn(self.other, self.results('index').context['posts'])
+        self.indexing.delete()
+        self.assertEqual(Posting.objects.filter(document=self.indexing.pk).count(), 0)
+
+    def test_totals_are_kept_without_scanning_the_index(self):
+        stats = SearchStats.objects.get()
+        self.assertEqual(stats.documents, 3)
+        self.assertEqual(stats.total_length, SearchDocument.objects.aggregate(total=Sum('length'))['total'])
+        self.assertEqual(SearchTerm.objects.get(term='index').documents, 2)
+        self.mention.delete()
+        self.assertEqual(SearchStats.objects.get().documents, 2)
+        self.assertEqual(SearchTerm.objects.get(term='index').documents, 1)
+        with CaptureQueriesContext(connection) as queries:
+            search('index tomato')
+        self.assertFalse([query for query in queries if 'SUM(' in query['sql'] or 'AVG(' in query['sql']])
+
+    @override_settings(BLOG_SEARCH_POSTINGS_PER_TERM=1)
+    def test_postings_read_per_term_are_capped(self):
+        self.assertEqual(self.results('index').context['posts'], [self.indexing])
+
+    def test_results_are_paginated(self):
+        for i in range(12):
+            Post.objects.create(author=self.author, title=f'Index {i}', content='index')
+        first = self.results('index')
+        self.assertTrue(first.context['is_paginated'])
+        self.assertEqual(len(first.context['posts']), 10)
+        second = self.results('index', page=2)
+        self.assertEqual(len(second.context['posts']), 4)
+        self.assertFalse(set(first.context['posts']) & set(second.context['posts']))
+
+    def test_rebuild_search_index(self):
+        Posting.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.results('gardening').context['posts'], [self.other])
+
+
+class PostSuggestTests(TestCase):
+
+    def setUp(self):
+        suggestion_index.invalidate()  # Drop what earlier (rolled back) tests loaded
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(author=self.author, title='Django signals in practice', content='...')
+            self.post.tags.add('Django', 'Databases')
+            Post.objects.create(author=self.author, title='Gardening diary', content='...').tags.add('Django')
+
+    def suggestions(self, query):
+        response = self.client.get(reverse('blog:post-suggest'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [(item['kind'], item['label']) for item in response.json()['suggestions']]
+
+    def test_prefixes_of_titles_and_tags(self):
+        self.assertEqual(self.suggestions('dj'), [('tag', 'Django'), ('post', 'Django signals in practice')])
+        self.assertEqual(self.suggestions('sig'), [('post', 'Django signals in practice')])
+        self.assertEqual(self.suggestions('django prac'), [('post', 'Django signals in practice')])
+        self.assertEqual(self.suggestions('da'), [('tag', 'Databases')])
+        self.assertEqual(self.suggestions(''), [])
+
+    def test_typos_fall_back_to_trigrams(self):
+        self.assertIn(('tag', 'Django'), self.suggestions('djnago'))
+
+    def test_popular_tags_rank_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add('Dancing')
+            Post.objects.create(author=self.author, title='Ballroom', content='...').tags.add('Dancing')
+        self.assertEqual(self.suggestions('da'), [('tag', 'Dancing'), ('tag', 'Databases')])
+
+    def test_index_follows_edits(self):
+        self.assertEqual(self.suggestions('gard'), [('post', 'Gardening diary')])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Gardening with Django'
+            self.post.save()
+        self.assertEqual(len(self.suggestions('gard')), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.suggestions('gard'), [('post', 'Gardening diary')])
+
+    def test_answers_without_queries(self):
+        self.suggestions('d')  # Loads the index
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggestions('django s'), [('post', 'Django signals in practice')])
+
+    def test_urls_are_built_from_plain_data(self):
+        """The table keeps ids and slugs, not URLs, so URLconf changes need no data migration"""
+        self.assertEqual(Suggestion.objects.get(kind=Suggestion.TAG, label='Django').slug, 'django')
+        response = self.client.get(reverse('blog:post-suggest'), {'q': 'dj'})
+        self.assertEqual(
+            [item['url'] for item in response.json()['suggestions']],
+            [reverse('blog:post-by-tag', kwargs={'tag_slug': 'django'}), self.post.get_absolute_url()],
+        )
+
+    def test_benchmark_command_leaves_the_table_alone(self):
+        """The latency budget lives in `manage.py benchmark_suggest`; here only check that it runs"""
+        out = StringIO()
+        call_command('benchmark_suggest', titles=50, queries=5, budget_ms=1000, stdout=out)
+        self.assertIn('50 titles: p95', out.getvalue())
+        self.assertEqual(Suggestion.objects.filter(kind=Suggestion.POST).count(), 2)
+        self.assertEqual(self.suggestions('gard'), [('post', 'Gardening diary')])
+
+
+class PostListTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='testpass')
+
+    def add_posts(self, count):
+        for i in range(count):
+            Post.objects.create(author=self.author, title=f'Post {i}', content='word ' * 500).tags.add('news')
+
+    def test_home_page_cost_is_constant(self):
+        self.add_posts(3)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('blog:post-list'))
+        self.add_posts(30)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.context['posts']), settings.BLOG_POSTS_PER_PAGE)
+        page_sql = next(query['sql'] for query in large if 'FROM "blog_post"' in query['sql'] and 'LIMIT' in query['sql'])
+        self.assertNotIn('"blog_post"."content"', page_sql)  # The body stays in the database
+
+    def test_tag_and_search_pages_are_paginated(self):
+        self.add_posts(12)
+        by_tag = self.client.get(reverse('blog:post-by-tag', args=['news']), {'page': 2})
+        self.assertEqual(len(by_tag.context['posts']), 2)
+        search = self.client.get(reverse('blog:post-search'), {'q': 'post'})
+        self.assertContains(search, 'q=post&amp;page=2')
+
+    @override_settings(BLOG_KEYSET_PAGINATION=True)
+    def test_keyset_pagination_walks_every_post_once(self):
+        self.add_posts(25)
+        seen, params = [], {}
+        while True:
+            response = self.client.get(reverse('blog:post-list'), params)
+            seen += [post.pk for post in response.context['posts']]
+            if not response.context['next_cursor']:
+                break
+            params = {'after': response.context['next_cursor']}
+        self.assertEqual(seen, list(Post.objects.order_by('-published_date', '-pk').values_list('pk', flat=True)))
+
+
+@override_settings(BLOG_EXCERPT_WORDS=5, BLOG_WORDS_PER_MINUTE=100)
+class PostMetadataTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='testpass')
+
+    def test_metadata_is_computed_on_save(self):
+        post = Post.objects.create(author=self.author, title='Long read', content='word ' * 250)
+        self.assertEqual((post.excerpt, post.word_count, post.reading_time), ('word word word word word…', 250, 3))
+        post.content = 'Short now.'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.word_count, post.reading_time), ('Short now.', 2, 1))
+
+    def test_backfill_command(self):
+        post = Post.objects.create(author=self.author, title='Imported', content='one two three')
+        Post.objects.filter(pk=post.pk).update(excerpt='', word_count=0)  # As after the migration
+        call_command('backfill_post_metadata', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.word_count), ('one two three', 3))
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=5, BLOG_COMMENT_MAX_DEPTH=3)
+class CommentThreadTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.post = Post.objects.create(author=self.user, title='Threads', content='...')
+        self.client.login(username='reader', password='testpass')
+
+    def comment(self, text, parent=None):
+        self.client.post(reverse('blog:add-comment', args=[self.post.pk]), {'content': text, 'parent': parent.pk if parent else ''})
+        return Comment.objects.get(content=text)
+
+    def test_replies_are_listed_under_their_parents(self):
+        first = self.comment('first')
+        second = self.comment('second')
+        reply = self.comment('reply to first', first)
+        nested = self.comment('reply to reply', reply)
+        too_deep = self.comment('too deep', nested)
+        self.assertEqual([reply.depth, nested.depth, too_deep.depth], [1, 2, 2])  # Capped at BLOG_COMMENT_MAX_DEPTH
+        self.assertEqual(too_deep.parent, reply)
+        comments = self.client.get(reverse('blog:post-detail', args=[self.post.pk])).context['comments']
+        self.assertEqual(comments, [first, reply, nested, too_deep, second])
+
+    def test_load_more_pages_through_every_comment(self):
+        for i in range(12):
+            parent = self.comment(f'comment {i}')
+            self.comment(f'reply {i}', parent)
+        response = self.client.get(reverse('blog:post-detail', args=[self.post.pk]))
+        seen = [comment.pk for comment in response.context['comments']]
+        url = response.context['next_comments_url']
+        while url:
+            with self.assertNumQueries(4):  # Session, user, post, one page of comments with authors
+                data = self.client.get(url).json()
+            seen += [comment['id'] for comment in data['comments']]
+            url = data['next']
+        self.assertEqual(seen, list(Comment.objects.order_by('path').values_list('pk', flat=True)))
+
+    def test_load_more_links_the_authors_own_comments(self):
+        mine = self.comment('mine')
+        other = User.objects.create_user(username='other', password='testpass')
+        Comment.objects.create(post=self.post, author=other, content='theirs')
+        data = self.client.get(reverse('blog:post-comments', args=[self.post.pk])).json()['comments']
+        self.assertEqual(
+            [(comment['is_author'], comment['edit_url'], comment['delete_url']) for comment in data],
+            [
+                (True, reverse('blog:edit-comment', args=[mine.pk]), reverse('blog:delete-comment', args=[mine.pk])),
+                (False, None, None),
+            ],
+        )
+
+    def test_detail_page_cost_is_bounded(self):
+        self.comment('one')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse('blog:post-detail', args=[self.post.pk]))
+        for i in range(20):
+            self.comment(f'more {i}')
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(reverse('blog:post-detail', args=[self.post.pk]))
+        self.assertEqual(len(few), len(many))
+
+
+class FragmentCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Cached title', content='Cached body')
+        self.url = reverse('blog:post-detail', args=[self.post.pk])
+
+    def page(self, url=None):
+        return self.client.get(url or self.url).content.decode()
+
+    def test_unchanged_fragments_come_from_the_cache(self):
+        self.page()
+        self.page(reverse('blog:post-list'))
+        Post.objects.filter(pk=self.post.pk).update(title='Changed behind the signals')
+        self.assertIn('Cached title', self.page())
+        self.assertIn('Cached title', self.page(reverse('blog:post-list')))
+
+    def test_edits_show_up_immediately(self):
+        self.page()
+        self.page(reverse('blog:post-list'))
+        self.post.title = 'Edited title'
+        self.post.save()
+        self.assertIn('Edited title', self.page())
+        self.assertIn('Edited title', self.page(reverse('blog:post-list')))
+
+        self.post.tags.add('caching')
+        self.assertIn('caching', self.page())
+        self.post.tags.remove('caching')
+        self.assertNotIn('caching', self.page())
+
+        self.assertIn('No comments yet', self.page())
+        Comment.objects.create(post=self.post, author=self.author, content='First!')
+        self.assertIn('First!', self.page())
+
+    def test_cache_hits_skip_the_comment_and_tag_queries(self):
+        Comment.objects.create(post=self.post, author=self.author, content='Cached comment')
+        self.post.tags.add('caching')
+        self.client.login(username='writer', password='testpass')  # Past the anonymous page cache
+        self.page()
+        self.page(reverse('blog:post-list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn('Cached comment', self.page())
+            self.assertIn('caching', self.page(reverse('blog:post-list')))
+        self.assertFalse([query for query in queries if 'blog_comment' in query['sql'] or 'blog_taggedpost' in query['sql']])
+
+    def test_comment_block_varies_by_user(self):
+        Comment.objects.create(post=self.post, author=self.author, content='Mine')
+        self.assertNotIn('Reply', self.page())
+        self.client.login(username='writer', password='testpass')
+        page = self.page()
+        self.assertIn('Reply', page)
+        self.assertIn(reverse('blog:delete-comment', args=[Comment.objects.get().pk]), page)
+
+
+class AnonymousPageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Cached page', content='Body')
+        self.post.tags.add('django')
+        self.detail = reverse('blog:post-detail', args=[self.post.pk])
+
+    def test_repeat_visits_skip_the_view(self):
+        first = self.client.get(self.detail)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.detail)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertNotIn('Last-Modified', second)  # No single timestamp covers the post, tags and comments
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.detail)['ETag']
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Comment.objects.create(post=self.post, author=self.author, content='New comment')
+        self.assertEqual(self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_posts_leave_expiring_versions(self):
+        """Versions read for a post that does not exist expire instead of piling up in the cache"""
+        with mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            self.assertEqual(self.client.get(reverse('blog:post-detail', args=[self.post.pk + 1000])).status_code, 404)
+        self.assertTrue(set_many.called)
+        self.assertTrue(all(call.kwargs['timeout'] for call in set_many.call_args_list))
+
+    def test_changes_purge_only_the_pages_they_touch(self):
+        other = Post.objects.create(author=self.author, title='Other post', content='Elsewhere')
+        other_url = reverse('blog:post-detail', args=[other.pk])
+        for url in (self.detail, other_url, reverse('blog:post-list'), reverse('blog:post-by-tag', args=['django'])):
+            self.client.get(url)
+
+        Comment.objects.create(post=self.post, author=self.author, content='New comment')
+        self.assertContains(self.client.get(self.detail), 'New comment')
+        with self.assertNumQueries(0):
+            self.client.get(other_url)
+            self.client.get(reverse('blog:post-list'))
+
+        other.tags.add('django')
+        self.assertContains(self.client.get(reverse('blog:post-by-tag', args=['django'])), 'Other post')
+
+    def test_logged_in_users_get_fresh_pages(self):
+        self.client.get(self.detail)
+        self.client.login(username='writer', password='testpass')
+        response = self.client.get(self.detail)
+        self.assertContains(response, 'Logout')
+        self.assertNotIn('ETag', response)
+
+
+class TagStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.client.login(username='writer', password='testpass')
+
+    def counts(self):
+        return dict(TagStats.objects.values_list('tag__name', 'post_count'))
+
+    def test_create_and_update_views_keep_counts(self):
+        self.client.post(reverse('blog:post-create'), {'title': 'One', 'content': '...', 'tags': 'django, orm'})
+        self.client.post(reverse('blog:post-create'), {'title': 'Two', 'content': '...', 'tags': 'django'})
+        self.assertEqual(self.counts(), {'django': 2, 'orm': 1})
+        post = Post.objects.get(title='One')
+        self.client.post(reverse('blog:post-edit', args=[post.pk]), {'title': 'One', 'content': '...', 'tags': 'django, caching'})
+        self.assertEqual(self.counts(), {'django': 2, 'orm': 0, 'caching': 1})
+        post.delete()
+        self.assertEqual(self.counts(), {'django': 1, 'orm': 0, 'caching': 0})
+
+    def test_tag_cloud_is_cached_until_tags_change(self):
+        post = Post.objects.create(author=self.author, title='Tagged', content='...')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add('django', 'orm')
+        other = Post.objects.create(author=self.author, title='Also tagged', content='...')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.add('django')
+        cloud = tag_cloud()
+        self.assertEqual([(tag['name'], tag['post_count'], tag['size']) for tag in cloud], [('django', 2, 5), ('orm', 1, 1)])
+        with self.assertNumQueries(0):
+            self.assertEqual(tag_cloud(), cloud)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.remove('django')
+        self.assertEqual([tag['post_count'] for tag in tag_cloud()], [1, 1])
+        self.assertContains(self.client.get(reverse('blog:tag-cloud')), reverse('blog:post-by-tag', args=['orm']))
+
+    def test_tag_listing_joins_the_tag_table_directly(self):
+        post = Post.objects.create(author=self.author, title='Tagged', content='...')
+        post.tags.add('django')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('blog:post-by-tag', args=['django']))
+        self.assertEqual(response.context['posts'], [post])
+        listing = next(query['sql'] for query in queries if 'FROM "blog_post"' in query['sql'])
+        self.assertIn('blog_taggedpost', listing)
+        self.assertNotIn('content_type', listing)
+
+
+class PostTaggingTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer', password='testpass')
+        self.client.login(username='writer', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Tagged', content='...')
+        set_post_tags(self.post, [f'tag{i}' for i in range(10)])
+
+    def edit(self, tags):
+        return self.client.post(reverse('blog:post-edit', args=[self.post.pk]), {'title': 'Tagged', 'content': '...', 'tags': tags})
+
+    def test_diff_ignores_case_and_keeps_current_spelling(self):
+        self.assertEqual(tag_diff(['Django', 'ORM'], ['django', 'caching']), (['caching'], ['ORM']))
+
+    def test_unchanged_tags_are_left_alone(self):
+        rows = set(TaggedPost.objects.values_list('pk', flat=True))
+        self.edit(', '.join(f'tag{i}' for i in range(10)))
+        self.assertEqual(set(TaggedPost.objects.values_list('pk', flat=True)), rows)
+
+    def test_edit_applies_only_the_difference(self):
+        self.assertEqual(set_post_tags(self.post, [f'tag{i}' for i in range(1, 11)]), (['tag10'], ['tag0']))
+        self.edit('tag1, tag2, new')
+        self.assertEqual(sorted(self.post.tags.names()), ['new', 'tag1', 'tag2'])
+        self.assertEqual(TagStats.objects.get(tag__name='tag5').post_count, 0)
+
+    def test_create_view_tags_the_new_post(self):
+        self.client.post(reverse('blog:post-create'), {'title': 'New', 'content': '...', 'tags': 'django, orm'})
+        self.assertEqual(sorted(Post.objects.get(title='New').tags.names()), ['django', 'orm'])
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_flagged(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['blog.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}})
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
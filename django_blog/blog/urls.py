@@ -21,9 +21,12 @@ urlpatterns = [
     path('post/new/', PostCreateView.as_view(), name='post-create'),  # Create new post
     path('post/<int:pk>/update/', PostUpdateView.as_view(), name='post-edit'),  # Edit post
     path('post/<int:pk>/delete/', PostDeleteView.as_view(), name='post-delete'),  # Delete post
+    path('post/<int:pk>/comments/', views.post_comments, name='post-comments'),
     path('post/<int:pk>/comments/new/', CommentCreateView.as_view(), name='add-comment'),
     path('comment/<int:pk>/update/', CommentUpdateView.as_view(), name='edit-comment'),
     path('comment/<int:pk>/delete/', CommentDeleteView.as_view(), name='delete-comment'),
     path('search/', PostSearchView.as_view(), name='post-search'),
+    path('search/suggest/', views.post_suggest, name='post-suggest'),
+    path('tags/', views.tag_cloud, name='tag-cloud'),
     path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='post-by-tag'),
 ]
\ No newline at end of file
@@ -1,15 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
+from django.db import transaction
+from django.http import HttpResponseRedirect, JsonResponse
+from django.views.decorators.http import require_GET
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 from .forms import (
     CustomUserCreationForm, ProfileUpdateForm,
     UserUpdateForm, PostForm, CommentForm
 )
 from .models import Profile, Post, Comment
+from . import fragments
+from .comments import comment_page, reply_parent, serialize as serialize_comment
+from .queries import ORDERING, decode_cursor, encode_cursor, list_posts, posts_after
+from .search import search
+from .suggest import suggest
+from .tags import set_post_tags, tag_cloud as cached_tag_cloud
 from taggit.models import Tag
 
 
@@ -51,32 +62,81 @@ def profile_edit(request):
         'profile_form': profile_form
     })
 
-# ✅ ListView - Display all blog posts
-class PostListView(ListView):
+class PostListMixin:
+    """
+    Shared by the post list pages: the optimized list queryset (blog/queries.py) and
+    pagination, by page number or, with BLOG_KEYSET_PAGINATION, by ``?after=`` cursor.
+    Subclasses narrow the posts in ``get_posts()``.
+    """
     model = Post
     template_name = 'blog/post_list.html'  # Template: blog/post_list.html
     context_object_name = 'posts'
-    ordering = ['-published_date']  # Show newest posts first
+
+    def get_posts(self):
+        return Post.objects.all()
 
     def get_queryset(self):
-        # Prefetch the related tags for all posts in the queryset
-        queryset = super().get_queryset()
-        queryset = queryset.prefetch_related('tags')
-        return queryset
+        return list_posts(self.get_posts()).order_by(*ORDERING)  # Show newest posts first
+
+    def get_paginate_by(self, queryset):
+        return settings.BLOG_POSTS_PER_PAGE
+
+    def paginate_queryset(self, queryset, page_size):
+        if not settings.BLOG_KEYSET_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+        # No COUNT(*) and no OFFSET: each page is a range read on the (published_date, id) index
+        cursor = decode_cursor(self.request.GET.get('after', ''))
+        if cursor:
+            queryset = posts_after(queryset, cursor)
+        posts = list(queryset[:page_size + 1])
+        has_next = len(posts) > page_size
+        posts = posts[:page_size]
+        self.next_cursor = encode_cursor(posts[-1]) if has_next else None
+        return None, None, posts, has_next
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = getattr(self, 'next_cursor', None)
+        # Each card is a cached fragment keyed on its post's version (blog/fragments.py)
+        context['posts'] = context['object_list'] = fragments.annotate(context['posts'])
+        context['fragment_timeout'] = settings.BLOG_FRAGMENT_CACHE_TIMEOUT
+        return context
+
+# ✅ ListView - Display all blog posts
+class PostListView(PostListMixin, ListView):
+    pass
 
 # ✅ DetailView - Show individual blog posts
 class PostDetailView(DetailView):
-    model = Post
     template_name = 'blog/post_detail.html'  # Template for displaying post details
+    queryset = Post.objects.select_related('author')  # Tags are read inside their fragment, on a miss only
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['comments'] = self.object.comments.all()  # Fetch all comments related to this post
+        # First page of comments in thread order, authors joined; the rest load through post_comments.
+        # Loaded when the post_comments fragment renders, so a cache hit never queries the comments.
+        page = SimpleLazyObject(lambda: comment_page(self.object))
+        context['comments'] = SimpleLazyObject(lambda: page[0])
+        context['next_comments_url'] = SimpleLazyObject(lambda: page[1] and comments_url(self.object, page[1]))
         context['form'] = CommentForm()  # Include the comment form
+        # Body, tags and comments render from cached fragments until a signal bumps these versions
+        context['post_version'] = fragments.version(fragments.POST, self.object.pk)
+        context['comments_version'] = fragments.version(fragments.COMMENTS, self.object.pk)
+        context['fragment_timeout'] = settings.BLOG_FRAGMENT_CACHE_TIMEOUT
         return context
 
+class PostTagsMixin:
+    """Saves the post, then its tags as one diff (blog/tags.py) instead of the form's own tag handling."""
+
+    def form_valid(self, form):
+        with transaction.atomic():
+            self.object = form.save(commit=False)
+            self.object.save()
+            set_post_tags(self.object, form.cleaned_data.get('tags') or [])
+        return HttpResponseRedirect(self.get_success_url())
+
 # ✅ CreateView - Allow logged-in users to create posts
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, PostTagsMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/post_form.html'  # Template: blog/post_form.html
@@ -86,19 +146,10 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         # Automatically assign the logged-in user as the post author
         form.instance.author = self.request.user
-        response = super().form_valid(form)
-
-        # Handle tags after the post is saved
-        self.handle_tags(form.cleaned_data.get('tags'))
-        return response
-
-    def handle_tags(self, tags):
-        """Ensure all selected tags exist and associate them with the post."""
-        for tag in tags:
-            self.object.tags.add(tag)  # Add tag to post
+        return super().form_valid(form)
 
 # ✅ UpdateView - Allow only the author to edit posts
-class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, PostTagsMixin, UpdateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/post_form.html'  # Reuse the same form template
@@ -108,20 +159,6 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         post = self.get_object()
         return self.request.user == post.author  # Allow only the post author to edit
 
-    def form_valid(self, form):
-        # Save the updated post
-        response = super().form_valid(form)
-
-        # Clear existing tags and add the newly selected tags
-        self.object.tags.clear()
-        self.handle_tags(form.cleaned_data.get('tags'))
-        return response
-
-    def handle_tags(self, tags):
-        """Ensure all selected tags exist and associate them with the post."""
-        for tag in tags:
-            self.object.tags.add(tag)  # Add tag to post
-
 # ✅ DeleteView - Allow only the author to delete posts
 class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Post
@@ -143,6 +180,9 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         post = get_object_or_404(Post, id=self.kwargs['pk'])
         form.instance.post = post
         form.instance.author = self.request.user
+        parent_id = self.request.POST.get('parent', '')
+        if parent_id.isdigit():  # A reply; ignore parents from other posts
+            form.instance.parent = reply_parent(Comment.objects.filter(pk=parent_id, post=post).first())
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -174,36 +214,54 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return reverse_lazy('blog:post-detail', kwargs={'pk': self.object.post.id})
 
 class PostSearchView(ListView):
-    model = Post
     template_name = 'blog/post_list.html'  # Reuse the post list template
     context_object_name = 'posts'
 
-    def get_queryset(self):
-        query = self.request.GET.get('q')
-        queryset = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+    def get_paginate_by(self, queryset):
+        return settings.BLOG_POSTS_PER_PAGE
 
-        return queryset
+    def get_queryset(self):
+        # Ranked lookup in the inverted index (blog/search.py); posts are loaded for the current page only
+        return search(self.request.GET.get('q', ''))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.request.GET.get('q', '')  # Pass query to template
+        context['posts'] = context['object_list'] = fragments.annotate(context['posts'], context['query'])
+        context['fragment_timeout'] = settings.BLOG_FRAGMENT_CACHE_TIMEOUT
         return context
 
-class PostByTagListView(ListView):
-    model = Post
-    template_name = 'blog/post_list.html'  # Reuse the post list template
-    context_object_name = 'posts'
+def comments_url(post, after):
+    return f"{reverse('blog:post-comments', kwargs={'pk': post.pk})}?{urlencode({'after': after})}"
+
+@require_GET
+def post_comments(request, pk):
+    """JSON page of a post's comments in thread order, for "Load more" (blog/comments.py)."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=pk)
+    comments, next_cursor = comment_page(post, after=request.GET.get('after'))
+    return JsonResponse({
+        'comments': [serialize_comment(comment, request.user) for comment in comments],
+        'next': next_cursor and comments_url(post, next_cursor),
+    })
 
-    def get_queryset(self):
+@require_GET
+def post_suggest(request):
+    """JSON suggestions for the search box, answered from the suggestion index and its cache (blog/suggest.py)."""
+    query = request.GET.get('q', '')
+    return JsonResponse({'query': query, 'suggestions': suggest(query)})
+
+class PostByTagListView(PostListMixin, ListView):
+
+    def get_posts(self):
         tag_slug = self.kwargs.get('tag_slug')
         self.tag = get_object_or_404(Tag, slug=tag_slug)  # Get the tag object
-        return Post.objects.filter(tags__in=[self.tag])  # Filter posts by tag
+        return Post.objects.filter(tagged_items__tag=self.tag)  # Joins TaggedPost on its (tag, post) index
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag  # Pass the tag to the template
-        return context
\ No newline at end of file
+        return context
+
+def tag_cloud(request):
+    """Every used tag sized by post count, from the cached cloud in blog/tags.py."""
+    return render(request, 'blog/tag_cloud.html', {'tags': cached_tag_cloud()})
@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -95,6 +96,18 @@ DATABASES = {
 }
 
 
+# Page/fragment versions, the tag cloud and suggestion versions live in the cache (blog/fragments.py,
+# blog/tags.py, blog/suggest.py). Set CACHE_URL (e.g. redis://localhost:6379/0) wherever more than one
+# process serves the blog: a process-local cache only purges the process that made the change
+# (blog.W001 under `manage.py check --deploy`). Tests always run on a local cache (django_blog/test_runner.py).
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TEST_RUNNER = 'django_blog.test_runner.LocalCacheTestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -143,3 +156,31 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 TAGGIT_CASE_INSENSITIVE = True
+
+# Post list pages (blog/views.py PostListMixin)
+BLOG_POSTS_PER_PAGE = 10
+BLOG_KEYSET_PAGINATION = False  # Page with an ?after= cursor instead of ?page=N (no COUNT, no OFFSET)
+BLOG_EXCERPT_WORDS = 20  # Words kept in Post.excerpt
+BLOG_WORDS_PER_MINUTE = 200  # Reading speed behind Post.reading_time
+BLOG_COMMENTS_PER_PAGE = 50  # Comments per page on a post (the rest load through blog:post-comments)
+BLOG_COMMENT_MAX_DEPTH = 5  # Deeper replies attach to the ancestor at this level
+BLOG_FRAGMENT_CACHE_TIMEOUT = 60 * 60  # Seconds a rendered post/tags/comments fragment is kept (blog/fragments.py)
+BLOG_PAGE_CACHE_VIEWS = ['blog:post-list', 'blog:post-detail', 'blog:post-by-tag']  # Whole pages cached for anonymous readers (blog/middleware.py)
+BLOG_PAGE_CACHE_TIMEOUT = 10 * 60  # Seconds
+BLOG_TAG_CLOUD_SIZE = 50  # Most used tags shown on the tag page (blog/tags.py)
+BLOG_TAG_CLOUD_STEPS = 5  # Font size steps in the cloud
+BLOG_TAG_CLOUD_TIMEOUT = 60 * 60  # Seconds; every tagging change also clears it
+
+# Profile picture thumbnails (blog/images.py)
+PROFILE_THUMBNAIL_SIZES = {'small': 48, 'medium': 128, 'large': 320}  # Longest edge in pixels
+PROFILE_THUMBNAIL_QUALITY = 80  # WebP quality
+IMAGE_PROCESSING_ASYNC = True  # Resize in a process pool after commit instead of inline
+IMAGE_PROCESS_WORKERS = 2
+
+# Full-text search (blog/search.py)
+BLOG_SEARCH_POSTINGS_PER_TERM = 1000  # Most frequent postings read per query term; rarer matches of very common terms are not ranked
+
+# Search box suggestions (blog/suggest.py)
+SUGGEST_LIMIT = 8  # Suggestions returned per query
+SUGGEST_MIN_SIMILARITY = 0.4  # Share of the query's trigrams a match must contain when nothing matches by prefix
+SUGGEST_CACHE_SIZE = 2000  # Answers kept in each process's LRU
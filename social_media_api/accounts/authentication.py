@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# What a cache entry keeps: plain values, never model instances, so requests do not share a mutable user.
+# Password hashes, profile fields and counters are left out and load (deferred) on first access.
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+CACHED_TOKEN_FIELDS = ('key', 'user_id', 'created')
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TokenCache:
+    """
+    Two-level token -> (user values, token values) cache: an in-process LRU in front of an
+    optional shared Django cache (``settings.TOKEN_CACHE_ALIAS``).
+
+    Other processes' LRUs are not told about invalidations, so keep
+    ``TOKEN_CACHE_TTL`` short; it bounds how long a revoked token is accepted there.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+    @property
+    def shared(self):
+        alias = settings.TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def cache_key(key):
+        return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()  # Never put raw tokens in cache keys
+
+    def get(self, key):
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(self.cache_key(key))
+            if entry is not None:
+                self.local.set(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(self.cache_key(key), entry, settings.TOKEN_SHARED_CACHE_TTL)
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self.cache_key(key))
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that serves token -> user lookups from ``token_cache``
+    instead of querying Token joined to User on every request. Each request
+    gets its own user and token instances, built from the cached values.
+    Entries are dropped on logout, token deletion and user saves (accounts.signals).
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            user, token = super().authenticate_credentials(key)  # Raises AuthenticationFailed for bad/inactive tokens
+            entry = (
+                tuple(getattr(user, name) for name in CACHED_USER_FIELDS),
+                tuple(getattr(token, name) for name in CACHED_TOKEN_FIELDS),
+            )
+            token_cache.set(key, entry)
+        user_values, token_values = entry
+        user = get_user_model().from_db(Token.objects.db, CACHED_USER_FIELDS, user_values)
+        token = Token.from_db(Token.objects.db, CACHED_TOKEN_FIELDS, token_values)
+        token.user = user
+        return user, token
@@ -0,0 +1,144 @@
+"""
+Follow-graph operations on the ``CustomUser.following`` through table.
+
+Every operation costs a fixed number of queries, however many users are
+followed. Bulk writes go straight to the through table with ``bulk_create`` and then
+send one ``follows_changed`` signal per chunk, which follower counters
+(accounts.signals) and feeds (posts.signals) handle a whole chunk at a time.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch import Signal
+from .models import CustomUser
+
+Follow = CustomUser.following.through  # from_customuser follows to_customuser
+
+FOLLOWED = 'followed'
+UNFOLLOWED = 'unfollowed'
+ALREADY_FOLLOWING = 'already_following'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+# Sent once per chunk by follow_many/unfollow_many, instead of an m2m_changed per follower, with
+# ``action`` ('post_add' or 'post_remove') and ``edges``, the changed (follower_id, user_id) pairs
+follows_changed = Signal()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _send(action, changed):
+    """Send follows_changed once for all of ``changed`` ({follower_id: {user_id, ...}})."""
+    edges = [(follower_id, user_id) for follower_id, user_ids in changed.items() for user_id in user_ids]
+    if edges:
+        follows_changed.send(sender=Follow, action=action, edges=edges)
+
+
+def follow(follower, user):
+    """Make ``follower`` follow ``user``. Returns True if a new edge was created."""
+    if follower.pk == user.pk or is_following(follower, user):
+        return False
+    follower.following.add(user)  # Sends m2m_changed for counters and feeds
+    return True
+
+
+def unfollow(follower, user):
+    """Remove the edge if it exists (one DELETE). Returns True if an edge was removed."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(from_customuser=follower, to_customuser=user).delete()
+        if deleted:
+            # following.remove() would signal even for a missing edge and skew the counters
+            m2m_changed.send(
+                sender=Follow, instance=follower, action='post_remove', reverse=False,
+                model=CustomUser, pk_set={user.pk}, using=Follow.objects.db,
+            )
+    return bool(deleted)
+
+
+def is_following(follower, user):
+    return Follow.objects.filter(from_customuser=follower, to_customuser=user).exists()
+
+
+def following_ids(follower, user_ids):
+    """The subset of ``user_ids`` that ``follower`` follows, in one query (for per-page flags)."""
+    if not user_ids:
+        return set()
+    return set(
+        Follow.objects.filter(from_customuser=follower, to_customuser__in=user_ids)
+        .values_list('to_customuser', flat=True)
+    )
+
+
+def mutuals(user):
+    """Users that ``user`` follows and who follow ``user`` back."""
+    return CustomUser.objects.filter(followers=user, following=user)
+
+
+def _classify(chunk, creating):
+    """
+    Validate a chunk of (follower_id, user_id) edges with two queries.
+    Returns per-edge results and the edges that need to be created (``creating``) or deleted.
+    """
+    known = set(CustomUser.objects.filter(pk__in={pk for edge in chunk for pk in edge}).values_list('pk', flat=True))
+    existing = set(
+        Follow.objects.filter(
+            from_customuser__in={follower_id for follower_id, _ in chunk},
+            to_customuser__in={user_id for _, user_id in chunk},
+        ).values_list('from_customuser', 'to_customuser')
+    )
+    results, changed = [], defaultdict(set)
+    for follower_id, user_id in chunk:
+        if follower_id not in known or user_id not in known:
+            status = NOT_FOUND
+        elif follower_id == user_id:
+            status = SELF
+        elif ((follower_id, user_id) in existing) == creating or user_id in changed[follower_id]:
+            status = ALREADY_FOLLOWING if creating else NOT_FOLLOWING  # Nothing to do, or a duplicate in the chunk
+        else:
+            status = FOLLOWED if creating else UNFOLLOWED
+            changed[follower_id].add(user_id)
+        results.append({'follower_id': follower_id, 'user_id': user_id, 'status': status})
+    return results, {follower_id: user_ids for follower_id, user_ids in changed.items() if user_ids}
+
+
+def follow_many(edges, chunk_size=None):
+    """
+    Create follow edges from an iterable of (follower_id, user_id) pairs.
+    Returns one result dict per input edge with a status of
+    ``followed``, ``already_following``, ``not_found`` or ``self``.
+    """
+    results = []
+    for chunk in chunked(edges, chunk_size or settings.FOLLOW_BATCH_SIZE):
+        chunk_results, changed = _classify(chunk, creating=True)
+        with transaction.atomic():
+            Follow.objects.bulk_create(
+                [Follow(from_customuser_id=f, to_customuser_id=u) for f, user_ids in changed.items() for u in user_ids],
+                ignore_conflicts=True,  # A concurrent follow wins; reconcile_counters fixes the count
+            )
+            _send('post_add', changed)
+        results.extend(chunk_results)
+    return results
+
+
+def unfollow_many(edges, chunk_size=None):
+    """
+    Remove follow edges from an iterable of (follower_id, user_id) pairs.
+    Statuses are ``unfollowed``, ``not_following``, ``not_found`` or ``self``.
+    """
+    results = []
+    for chunk in chunked(edges, chunk_size or settings.FOLLOW_BATCH_SIZE):
+        chunk_results, changed = _classify(chunk, creating=False)
+        with transaction.atomic():
+            for follower_id, user_ids in changed.items():
+                Follow.objects.filter(from_customuser=follower_id, to_customuser__in=user_ids).delete()
+            _send('post_remove', changed)
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,65 @@
+import csv
+import json
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts import follow_graph
+
+
+class Command(BaseCommand):
+    help = (
+        "Create (or with --unfollow, remove) follow edges in bulk from a CSV or JSONL stream. "
+        "CSV rows are `follower_id,user_id` (a header row is skipped); "
+        'JSONL lines are {"follower_id": 1, "user_id": 2}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or - for stdin.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension, else csv.")
+        parser.add_argument('--unfollow', action='store_true', help="Remove the edges instead of creating them.")
+        parser.add_argument('--chunk-size', type=int, default=settings.FOLLOW_BATCH_SIZE, help="Edges per bulk write.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        operation = follow_graph.unfollow_many if options['unfollow'] else follow_graph.follow_many
+
+        try:
+            edges = self.read_jsonl(stream) if fmt == 'jsonl' else self.read_csv(stream)
+            results = operation(edges, chunk_size=options['chunk_size'])
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        totals = Counter()
+        for line, result in enumerate(results, start=1):
+            totals[result['status']] += 1
+            if options['verbosity'] > 1 or result['status'] in (follow_graph.NOT_FOUND, follow_graph.SELF):
+                self.stdout.write(f"edge {line}: {result['follower_id']} -> {result['user_id']}: {result['status']}")
+        self.stdout.write(", ".join(f"{status}: {count}" for status, count in sorted(totals.items())) or "No edges read")
+
+    def read_csv(self, stream):
+        for line, row in enumerate(csv.reader(stream), start=1):
+            if not row or (line == 1 and not row[0].strip().isdigit()):
+                continue  # Blank line or header
+            yield self.parse_edge(line, row[:2])
+
+    def read_jsonl(self, stream):
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                data = json.loads(text)
+            except ValueError as exc:
+                raise CommandError(f"Line {line}: invalid JSON ({exc})")
+            yield self.parse_edge(line, [data.get('follower_id'), data.get('user_id')])
+
+    def parse_edge(self, line, values):
+        try:
+            follower_id, user_id = (int(value) for value in values)
+        except (TypeError, ValueError):
+            raise CommandError(f"Line {line}: expected two user ids, got {values!r}")
+        return follower_id, user_id
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='profile_picture_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
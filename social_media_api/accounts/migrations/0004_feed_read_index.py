@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_profile_picture_thumbnails'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['followers_count'], name='user_followers_count_idx'),
+        ),
+    ]
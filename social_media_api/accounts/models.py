@@ -4,21 +4,31 @@ from django.db import models
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture_thumbnails = models.JSONField(default=dict, blank=True, editable=False)  # Filled by accounts/images.py
     following = models.ManyToManyField('self', symmetrical=False, related_name='followers', blank=True)
+    # Denormalized counters, kept in step by accounts.signals and reconciled by `manage.py reconcile_counters`
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['followers_count'], name='user_followers_count_idx'),  # High-fanout authors (posts/feed.py)
+        ]
 
     def follow(self, user):
         """Follow another user."""
-        if user != self:
-            self.following.add(user)
+        from .follow_graph import follow
+        return follow(self, user)
 
     def unfollow(self, user):
         """Unfollow another user."""
-        if user in self.following.all():
-            self.following.remove(user)
+        from .follow_graph import unfollow
+        return unfollow(self, user)
 
     def is_following(self, user):
         """Check if the current user is following another user."""
-        return self.following.filter(id=user.id).exists()
+        from .follow_graph import is_following
+        return is_following(self, user)
 
     def __str__(self):
         return self.username
@@ -1,6 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
+from . import follow_graph
+from .images import thumbnail_urls
 
 User = get_user_model()
 
@@ -26,37 +29,84 @@ class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
 
-class UserSerializer(serializers.ModelSerializer):
+class ProfilePictureThumbnailsMixin(serializers.Serializer):
+    profile_picture_thumbnails = serializers.SerializerMethodField()  # {"small": url, "medium": url, ...}
+
+    def get_profile_picture_thumbnails(self, obj):
+        urls = thumbnail_urls(obj)
+        request = self.context.get('request')
+        if request is not None:
+            urls = {label: request.build_absolute_uri(url) for label, url in urls.items()}
+        return urls
+
+
+class UserSerializer(ProfilePictureThumbnailsMixin, serializers.ModelSerializer):
     token = serializers.SerializerMethodField()
-    followers_count = serializers.IntegerField(source='followers.count', read_only=True)
-    following_count = serializers.IntegerField(source='following.count', read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)  # Denormalized counter column
+    following_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count', 'token')
+        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_thumbnails', 'followers_count', 'following_count', 'token')
         read_only_fields = ['id', 'username', 'followers_count', 'following_count', 'token']
 
     def get_token(self, obj):
-        try:
-            token = Token.objects.get(user=obj)
-        except Token.DoesNotExist:
-            token = Token.objects.create(user=obj)
+        request = self.context.get('request')
+        if request is not None and isinstance(request.auth, Token) and request.auth.user_id == obj.pk:
+            return request.auth.key  # Already authenticated with this token, no lookup needed
+        token, _ = Token.objects.get_or_create(user=obj)
         return token.key
 
-class UserListSerializer(serializers.ModelSerializer):
+class FollowingFlagListSerializer(serializers.ListSerializer):
+    """
+    Looks up which users on the page the requesting user follows in a single
+    query, so the child's ``is_following`` flag costs nothing per row.
+    """
+
+    def to_representation(self, data):
+        users = list(data.all() if hasattr(data, 'all') else data)
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            self.child.following_ids = follow_graph.following_ids(request.user, [user.pk for user in users])
+        return super().to_representation(users)
+
+
+class FollowingFlagMixin(serializers.Serializer):
+    is_following = serializers.SerializerMethodField()  # Whether the requesting user follows this user
+
+    def get_is_following(self, obj):
+        following_ids = getattr(self, 'following_ids', None)
+        if following_ids is not None:
+            return obj.pk in following_ids
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return False
+        return follow_graph.is_following(request.user, obj)
+
+
+class UserListSerializer(FollowingFlagMixin, ProfilePictureThumbnailsMixin, serializers.ModelSerializer):
     """
     Serializer used for listing users (excludes token).
     """
 
-    followers_count = serializers.IntegerField(source='followers.count', read_only=True)
-    following_count = serializers.IntegerField(source='following.count', read_only=True)
+    followers_count = serializers.IntegerField(read_only=True)  # Denormalized counter column
+    following_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'followers_count', 'following_count')
+        fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_thumbnails', 'followers_count', 'following_count', 'is_following')
+        list_serializer_class = FollowingFlagListSerializer
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowSerializer(FollowingFlagMixin, serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username']
+        fields = ['id', 'username', 'is_following']
         read_only_fields = ['id', 'username']
+        list_serializer_class = FollowingFlagListSerializer
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_FOLLOW_MAX_ITEMS,
+    )
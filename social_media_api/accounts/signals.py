@@ -0,0 +1,68 @@
+from collections import Counter
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .follow_graph import follows_changed
+from .images import schedule_thumbnails
+from .models import CustomUser
+
+
+@receiver(m2m_changed, sender=CustomUser.following.through)
+def update_follow_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep follower/following counters correct on follow/unfollow.
+    Django only puts the edges that were actually added/removed in ``pk_set``.
+    """
+    if action == 'pre_clear':
+        related = instance.followers if reverse else instance.following
+        pk_set, delta = set(related.values_list('pk', flat=True)), -1
+    elif action in ('post_add', 'post_remove'):
+        delta = 1 if action == 'post_add' else -1
+    else:
+        return
+    if not pk_set:
+        return
+
+    if reverse:  # instance is the followed user, pk_set its followers
+        CustomUser.objects.filter(pk=instance.pk).update(followers_count=F('followers_count') + delta * len(pk_set))
+        CustomUser.objects.filter(pk__in=pk_set).update(following_count=F('following_count') + delta)
+    else:
+        CustomUser.objects.filter(pk=instance.pk).update(following_count=F('following_count') + delta * len(pk_set))
+        CustomUser.objects.filter(pk__in=pk_set).update(followers_count=F('followers_count') + delta)
+
+
+@receiver(follows_changed)
+def update_follow_counts_in_bulk(sender, action, edges, **kwargs):
+    """The bulk path (accounts/follow_graph.py): each counter column moves with one UPDATE per chunk."""
+    delta = 1 if action == 'post_add' else -1
+    for field, counts in (
+        ('following_count', Counter(follower_id for follower_id, _ in edges)),
+        ('followers_count', Counter(user_id for _, user_id in edges)),
+    ):
+        change = Case(
+            *(When(pk=pk, then=Value(delta * count)) for pk, count in counts.items()),
+            default=Value(0), output_field=IntegerField(),
+        )
+        CustomUser.objects.filter(pk__in=counts).update(**{field: F(field) + change})
+
+
+@receiver(post_save, sender=CustomUser)
+def build_profile_thumbnails(sender, instance, **kwargs):
+    schedule_thumbnails(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached token lookups when a user changes (password, is_active, profile...)."""
+    if created:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        token_cache.delete(key)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
@@ -1,3 +1,217 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from posts.models import Post, FeedEntry
+from .authentication import CachedTokenAuthentication, token_cache
+from .follow_graph import follow_many
+from .images import thumbnail_urls
 
-# Create your tests here.
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        token_cache.local.clear()
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('list-following'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query for query in queries if 'authtoken_token' in query['sql']]
+
+    def test_repeat_requests_skip_token_lookup(self):
+        """Only the first request hits the token table"""
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(self.token_queries(), [])
+
+    def test_logout_revokes_cached_token(self):
+        """Logging out deletes the token and its cached lookup"""
+        self.token_queries()
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse('list-following'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_requests_get_their_own_user(self):
+        """Cached lookups keep plain values; each request builds a fresh user with current counters"""
+        self.token_queries()
+        User.objects.filter(pk=self.user.pk).update(followers_count=7)  # Counters move without post_save
+        auth = CachedTokenAuthentication()
+        first, _ = auth.authenticate_credentials(self.token.key)
+        second, token = auth.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertIs(token.user, second)
+        self.assertNotIn('password', vars(first))
+        self.assertEqual(self.client.get(reverse('profile')).data['followers_count'], 7)
+
+    def test_password_change_invalidates_cache(self):
+        """Saving the user drops the cached lookup so the next request re-reads it"""
+        self.token_queries()
+        self.user.set_password('newpass123')
+        self.user.save()
+        self.assertEqual(len(self.token_queries()), 1)
+
+
+class BulkFollowTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.others = [User.objects.create(username=f'user{i}') for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_follow_reports_per_user_status(self):
+        """Valid ids are followed in bulk; the rest get an explanatory status"""
+        self.user.follow(self.others[0])
+        Post.objects.create(author=self.others[1], title='Hello', content='Body')
+        ids = [self.others[0].pk, self.others[1].pk, self.others[2].pk, self.others[2].pk, self.user.pk, 999999]
+
+        response = self.client.post(reverse('bulk-follow'), {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['already_following', 'followed', 'followed', 'already_following', 'self', 'not_found'],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.following.count(), 3)
+        self.assertEqual(self.user.following_count, 3)  # Counters and feeds see the bulk write
+        self.assertTrue(FeedEntry.objects.filter(owner=self.user, post__author=self.others[1]).exists())
+
+    def test_bulk_unfollow(self):
+        self.user.following.add(*self.others[:3])
+        ids = [user.pk for user in self.others[:4]]
+        response = self.client.post(reverse('bulk-unfollow'), {'user_ids': ids}, format='json')
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['unfollowed', 'unfollowed', 'unfollowed', 'not_following'],
+        )
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.following.count(), self.user.following_count), (0, 0))
+
+    def test_import_follows_command(self):
+        """CSV and JSONL edge files are imported in chunks"""
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'edges.csv')
+            with open(csv_path, 'w') as f:
+                f.write('follower_id,user_id\n')
+                f.writelines(f'{self.user.pk},{other.pk}\n' for other in self.others[:3])
+            jsonl_path = os.path.join(directory, 'edges.jsonl')
+            with open(jsonl_path, 'w') as f:
+                f.write(f'{{"follower_id": {self.others[0].pk}, "user_id": {self.user.pk}}}\n')
+
+            out = StringIO()
+            call_command('import_follows', csv_path, chunk_size=2, stdout=out)
+            call_command('import_follows', jsonl_path, stdout=out)
+
+        self.assertIn('followed: 3', out.getvalue())
+        self.assertEqual(self.user.following.count(), 3)
+        self.assertTrue(self.others[0].is_following(self.user))
+
+    def test_bulk_follow_queries_do_not_grow_with_followers(self):
+        """A chunk of edges from many followers costs the same as one edge: counters and feeds are batched"""
+        for other in self.others:
+            Post.objects.create(author=other, title='Hello', content='Body')
+        with CaptureQueriesContext(connection) as one:
+            follow_many([(self.user.pk, self.others[0].pk)])
+        edges = [(follower.pk, author.pk) for follower in self.others[1:] for author in self.others if follower != author]
+        with CaptureQueriesContext(connection) as many:
+            follow_many(edges)
+        self.assertEqual(len(many), len(one))
+
+        self.others[1].refresh_from_db()
+        self.assertEqual((self.others[1].following_count, self.others[1].followers_count), (4, 3))
+        self.assertEqual(FeedEntry.objects.filter(owner=self.others[1]).count(), 4)
+
+
+class FollowGraphTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.others = [User.objects.create(username=f'user{i}') for i in range(6)]
+        self.client.force_authenticate(self.user)
+
+    def test_unfollow_is_constant_query_and_keeps_counters(self):
+        """Unfollowing does not load the following set, and unfollowing a stranger changes nothing"""
+        self.user.following.add(*self.others)
+        with self.assertNumQueries(7):  # Savepoint, delete edge, two counter updates, feed prune, catch-up check, release
+            self.assertTrue(self.user.unfollow(self.others[0]))
+        self.assertFalse(self.user.unfollow(self.others[0]))
+
+        self.user.refresh_from_db()
+        self.others[0].refresh_from_db()
+        self.assertEqual((self.user.following_count, self.others[0].followers_count), (5, 0))
+
+    def test_mutuals(self):
+        self.user.following.add(*self.others[:3])
+        self.others[1].follow(self.user)
+        response = self.client.get(reverse('list-mutuals'))
+        self.assertEqual([user['username'] for user in response.data['results']], ['user1'])
+
+    def test_user_list_flags_cost_one_query_per_page(self):
+        """is_following for a whole page comes from one lookup"""
+        self.user.following.add(*self.others[::2])
+        with self.assertNumQueries(3):  # Count, page, following flags
+            response = self.client.get(reverse('list-users'))
+        flags = {user['username']: user['is_following'] for user in response.data['results']}
+        self.assertEqual(flags, {'reader': False, 'user0': True, 'user1': False, 'user2': True, 'user3': False, 'user4': True, 'user5': False})
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False, PROFILE_THUMBNAIL_SIZES={'small': 32, 'large': 64})
+class ProfileThumbnailTests(APITestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def upload(self):
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('avatar.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_builds_webp_thumbnails(self):
+        """Each configured size is written as WebP and exposed as a URL"""
+        user = User.objects.create(username='reader', profile_picture=self.upload())
+        user.refresh_from_db()
+
+        self.assertEqual(set(user.profile_picture_thumbnails), {'source', 'small', 'large'})
+        with Image.open(os.path.join(self.media_root, user.profile_picture_thumbnails['large'])) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (64, 32)))
+
+        self.client.force_authenticate(user)
+        urls = self.client.get(reverse('profile')).data['profile_picture_thumbnails']
+        self.assertTrue(urls['small'].endswith('_32.webp'))
+
+    def test_new_picture_replaces_old_thumbnails(self):
+        """The saved instance sees its thumbnails, and a new picture's thumbnails replace the old files"""
+        user = User.objects.create(username='reader', profile_picture=self.upload())
+        old = user.profile_picture_thumbnails  # Set on the instance itself, no refresh needed
+        self.assertEqual(set(old), {'source', 'small', 'large'})
+
+        user.profile_picture = self.upload()
+        user.save()
+        self.assertNotEqual(user.profile_picture_thumbnails['source'], old['source'])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, old['large'])))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, user.profile_picture_thumbnails['large'])))
+
+    def test_falls_back_to_original_until_ready(self):
+        user = User(username='reader', profile_picture='profile_pics/avatar.jpg')
+        self.assertEqual(thumbnail_urls(user), {'small': '/media/profile_pics/avatar.jpg', 'large': '/media/profile_pics/avatar.jpg'})
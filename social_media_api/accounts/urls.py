@@ -1,17 +1,21 @@
 from django.urls import path
 from .views import (
-    RegisterView, LoginView, UserProfileView,
-    FollowUserView,UnfollowUserView, ListFollowersView,
-    ListFollowingView, ListUsersView
+    RegisterView, LoginView, LogoutView, UserProfileView,
+    FollowUserView,UnfollowUserView, BulkFollowView, BulkUnfollowView, ListFollowersView,
+    ListFollowingView, ListMutualsView, ListUsersView
 )
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
     path('followers/', ListFollowersView.as_view(), name='list-followers'),
     path('following/', ListFollowingView.as_view(), name='list-following'),
+    path('mutuals/', ListMutualsView.as_view(), name='list-mutuals'),
     path('users/', ListUsersView.as_view(), name='list-users'),
 ]
\ No newline at end of file
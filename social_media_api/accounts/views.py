@@ -1,13 +1,14 @@
 from rest_framework import generics, status, permissions, mixins
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.authentication import TokenAuthentication
+from .authentication import CachedTokenAuthentication
 from django.contrib.auth import authenticate
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer,
-    FollowSerializer, UserListSerializer
+    FollowSerializer, UserListSerializer, BulkFollowSerializer
 )
 from .models import CustomUser
+from . import follow_graph
 
 class RegisterView(APIView):
     def post(self, request):
@@ -27,13 +28,24 @@ class LoginView(APIView):
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class LogoutView(APIView):
+    """
+    Revokes the token used for this request (and its cached lookup).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.auth is not None:
+            request.auth.delete()  # accounts.signals drops the cached lookup
+        return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
+
 class UserProfileView(APIView):
-    authentication_classes = [TokenAuthentication]  # Require authentication
+    authentication_classes = [CachedTokenAuthentication]  # Require authentication
     permission_classes = [permissions.IsAuthenticated]  # User must be logged in
 
     def get(self, request):
-        user = request.user
-        serializer = UserSerializer(user)
+        request.user.refresh_from_db(fields=request.user.get_deferred_fields())  # Fields the token cache leaves out, in one query
+        serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -72,6 +84,32 @@ class UnfollowUserView(APIView):
         return Response({"message": f"You have unfollowed {user_to_unfollow.username}"}, status=status.HTTP_200_OK)
 
 
+class BulkFollowView(APIView):
+    """
+    Follows a list of users in one request and reports a status per user id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    operation = staticmethod(follow_graph.follow_many)
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        edges = [(request.user.pk, user_id) for user_id in serializer.validated_data['user_ids']]
+        results = [
+            {'user_id': result['user_id'], 'status': result['status']}
+            for result in self.operation(edges)
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class BulkUnfollowView(BulkFollowView):
+    """
+    Unfollows a list of users in one request and reports a status per user id.
+    """
+    operation = staticmethod(follow_graph.unfollow_many)
+
+
 class ListFollowersView(generics.GenericAPIView, mixins.ListModelMixin):
     """
     List all followers of the current user.
@@ -97,6 +135,16 @@ class ListFollowingView(generics.ListAPIView):
         user = self.request.user
         return user.following.all()  # Get all users the current user is following
 
+class ListMutualsView(generics.ListAPIView):
+    """
+    List users the current user follows who also follow them back.
+    """
+    serializer_class = FollowSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return follow_graph.mutuals(self.request.user).order_by('username')
+
 class ListUsersView(generics.ListAPIView):
     """
     List all registered users.
@@ -0,0 +1,100 @@
+"""
+Notification coalescing.
+
+Notifications with the same (recipient, verb, target) that arrive within
+``NOTIFICATION_COALESCE_WINDOW`` seconds of each other are folded into one
+row: ``actor`` is the latest actor, ``actor_count`` the number of distinct
+actors (de-duplicated through ``NotificationActor``, so someone liking,
+unliking and liking again counts once) and ``sample_actor_ids`` keeps the
+``NOTIFICATION_SAMPLE_ACTORS`` most recent. A viral post therefore costs one
+row per recipient per window, not one per like, and the row itself stays small.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Notification, NotificationActor
+
+
+def coalesce_key(notification):
+    return (notification.recipient_id, notification.verb, notification.target_ct_id, notification.target_id)
+
+
+def merge_samples(newest_first, older):
+    samples = []
+    for actor_id in list(newest_first) + list(older):
+        if actor_id not in samples:
+            samples.append(actor_id)
+    return samples[:settings.NOTIFICATION_SAMPLE_ACTORS]
+
+
+def fold(batch):
+    """
+    Fold unsaved notifications sharing a key into one per key, in memory. Each
+    kept notification gets ``batch_actor_ids``, its distinct actors in this batch.
+    """
+    groups = {}
+    for notification in sorted(batch, key=lambda n: n.timestamp, reverse=True):  # Newest first
+        key = coalesce_key(notification)
+        if key not in groups:
+            notification.batch_actor_ids = [notification.actor_id]
+            notification.sample_actor_ids = [notification.actor_id]
+            notification.started_at = notification.timestamp
+            groups[key] = notification
+        else:
+            group = groups[key]
+            group.started_at = notification.timestamp  # Oldest so far
+            if notification.actor_id not in group.batch_actor_ids:
+                group.batch_actor_ids.append(notification.actor_id)
+            group.sample_actor_ids = merge_samples(group.sample_actor_ids, [notification.actor_id])
+    for notification in groups.values():
+        notification.actor_count = len(notification.batch_actor_ids)
+    return list(groups.values())
+
+
+@transaction.atomic
+def store(batch):
+    """
+    Write a batch of unsaved notifications, updating rows whose window is still
+    open in place and bulk-inserting the rest. A row's window starts when it is
+    created, so steady activity cannot keep one row open forever. Only actors
+    new to a row add to its count; the check reads at most the batch's actors.
+    """
+    since = timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+    new, links = [], []
+    for notification in fold(batch):
+        open_row = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient_id=notification.recipient_id,
+                target_ct_id=notification.target_ct_id,
+                target_id=notification.target_id,
+                verb=notification.verb,
+                started_at__gte=since,
+            )
+            .order_by('-started_at')
+            .first()
+        )
+        if open_row is None:
+            new.append(notification)
+            continue
+        seen = set(
+            NotificationActor.objects.filter(notification=open_row, actor__in=notification.batch_actor_ids)
+            .values_list('actor_id', flat=True)
+        )
+        unseen = [actor_id for actor_id in notification.batch_actor_ids if actor_id not in seen]
+        links += [NotificationActor(notification=open_row, actor_id=actor_id) for actor_id in unseen]
+        open_row.actor_id = notification.actor_id
+        open_row.actor_count += len(unseen)
+        open_row.sample_actor_ids = merge_samples(notification.sample_actor_ids, open_row.sample_actor_ids)
+        open_row.timestamp = notification.timestamp
+        open_row.is_read = False  # New activity resurfaces the notification
+        open_row.save(update_fields=['actor', 'actor_count', 'sample_actor_ids', 'timestamp', 'is_read'])
+    Notification.objects.bulk_create(new, batch_size=settings.NOTIFICATION_BATCH_SIZE)
+    links += [
+        NotificationActor(notification=notification, actor_id=actor_id)
+        for notification in new
+        for actor_id in notification.batch_actor_ids
+    ]
+    NotificationActor.objects.bulk_create(links, batch_size=settings.NOTIFICATION_BATCH_SIZE, ignore_conflicts=True)
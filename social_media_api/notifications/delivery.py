@@ -0,0 +1,101 @@
+"""
+Notification delivery.
+
+``notify()`` builds an unsaved Notification and hands it to an in-process
+queue once the surrounding transaction commits. A daemon thread drains the
+queue and writes notifications in batches of up to ``NOTIFICATION_BATCH_SIZE``
+(coalesced by notifications/coalescing.py, then ``bulk_create``), waiting at most ``NOTIFICATION_FLUSH_INTERVAL``
+seconds for a batch to fill, so the request path never waits on the insert.
+
+Delivery is best effort: notifications still queued when the process dies
+are lost. Set ``NOTIFICATIONS_ASYNC = False`` to write inline (tests, scripts).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from . import coalescing
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationQueue:
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def put(self, notification):
+        self._ensure_worker()
+        self._queue.put(notification)
+
+    def flush(self):
+        """Write everything currently queued from the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+    def write(self, batch):
+        try:
+            coalescing.store(batch)
+        except Exception:
+            logger.exception("Dropped %d notification(s)", len(batch))
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]  # Block until there is something to write
+        deadline = time.monotonic() + settings.NOTIFICATION_FLUSH_INTERVAL
+        while len(batch) < settings.NOTIFICATION_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self.write(batch)
+            close_old_connections()  # The worker owns its own DB connection
+
+
+notification_queue = NotificationQueue()
+atexit.register(notification_queue.flush)
+
+
+def notify(recipient, actor, verb, target):
+    """Queue a notification to ``recipient`` that ``actor`` ``verb`` ``target``."""
+    notification = Notification(
+        recipient=recipient,
+        actor=actor,
+        verb=verb,
+        target_ct=ContentType.objects.get_for_model(target),  # Served from ContentType's in-memory cache
+        target_id=target.pk,
+    )
+    if settings.NOTIFICATIONS_ASYNC:
+        transaction.on_commit(partial(notification_queue.put, notification))
+    else:
+        notification_queue.write([notification])
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+def fill_actor_ids(apps, schema_editor):
+    # The sample is all that is known about older rows' actors; repeats beyond it may still count again
+    Notification = apps.get_model('notifications', 'Notification')
+    rows = []
+    for row in Notification.objects.only('actor_id', 'sample_actor_ids').iterator(chunk_size=2000):
+        row.actor_ids = row.sample_actor_ids or [row.actor_id]
+        rows.append(row)
+    Notification.objects.bulk_update(rows, ['actor_ids'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_coalescing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(fill_actor_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_windows_and_actors(apps, schema_editor):
+    # Open windows are taken to start at their latest activity; the actors come from the old id lists
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    Notification.objects.update(started_at=models.F('timestamp'))
+    links = []
+    for row in Notification.objects.only('actor_id', 'actor_ids').iterator(chunk_size=2000):
+        links += [NotificationActor(notification_id=row.pk, actor_id=actor_id) for actor_id in row.actor_ids or [row.actor_id]]
+        if len(links) >= 2000:
+            NotificationActor.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    NotificationActor.objects.bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0004_coalesce_distinct_actors'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_coalesce_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'target_ct', 'target_id', '-started_at'], name='notif_window_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='actor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='notificationactor',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actors', to='notifications.notification'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationactor',
+            constraint=models.UniqueConstraint(fields=('notification', 'actor'), name='notif_actor_unique'),
+        ),
+        migrations.RunPython(fill_windows_and_actors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notification',
+            name='actor_ids',
+        ),
+    ]
@@ -16,9 +16,35 @@ class Notification(models.Model):
     target_id = models.PositiveIntegerField()
     target = GenericForeignKey('target_ct', 'target_id')
     timestamp = models.DateTimeField(default=timezone.now)
+    is_read = models.BooleanField(default=False)
+    # Coalescing (notifications/coalescing.py): one row stands for every actor within the window
+    started_at = models.DateTimeField(default=timezone.now)  # Start of the coalescing window; fixed when the row is created
+    actor_count = models.PositiveIntegerField(default=1)  # Distinct actors, de-duplicated through NotificationActor
+    sample_actor_ids = models.JSONField(default=list, blank=True)  # Most recent actors first, capped
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_ts_idx'),  # Inbox pages
+            models.Index(fields=['recipient'], condition=models.Q(is_read=False), name='notif_unread_idx'),  # Unread counts
+            models.Index(fields=['recipient', 'target_ct', 'target_id', '-started_at'], name='notif_window_idx'),
+        ]
 
     def __str__(self):
+        if self.actor_count > 1:
+            return f"{self.actor.username} and {self.actor_count - 1} others {self.verb} {self.target}"
         return f"{self.actor.username} {self.verb} {self.target}"
+
+
+class NotificationActor(models.Model):
+    """
+    One row per distinct actor folded into a coalesced notification, so repeat
+    activity by the same user (like, unlike, like) is counted once.
+    """
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actors')
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'actor'], name='notif_actor_unique'),
+        ]
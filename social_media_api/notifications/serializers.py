@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor = serializers.ReadOnlyField(source='actor.username')  # Display actor's username
+    target_type = serializers.ReadOnlyField(source='target_ct.model')  # e.g. "post"
+    target = serializers.StringRelatedField()  # Resolved through the prefetched GenericForeignKey
+    sample_actors = serializers.SerializerMethodField()
+    summary = serializers.SerializerMethodField()  # e.g. "alice and 41 others liked your post"
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'actor', 'actor_count', 'sample_actors', 'summary', 'verb', 'target_type', 'target_id', 'target', 'timestamp', 'is_read']
+        read_only_fields = fields
+
+    def get_sample_actors(self, obj):
+        """Usernames of the most recent actors, from the page-wide lookup the view puts in context."""
+        names = self.context.get('actor_names', {})
+        return [names[actor_id] for actor_id in obj.sample_actor_ids if actor_id in names] or [obj.actor.username]
+
+    def get_summary(self, obj):
+        if obj.actor_count > 1:
+            return f"{obj.actor.username} and {obj.actor_count - 1} others {obj.verb}"
+        return f"{obj.actor.username} {obj.verb}"
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs['all'] and not attrs.get('ids'):
+            raise serializers.ValidationError("Provide a list of notification ids or set all to true.")
+        return attrs
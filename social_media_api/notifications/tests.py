@@ -1,3 +1,137 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from posts.models import Post
+from .delivery import notification_queue, notify
+from .models import Notification, NotificationActor
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False)
+class InboxTests(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='Body') for i in range(12)]
+        for i, post in enumerate(self.posts):
+            actor = User.objects.create(username=f'fan{i}')
+            notify(recipient=self.author, actor=actor, verb="liked your post", target=post)
+        self.client.force_authenticate(self.author)
+
+    def test_like_notifies_author(self):
+        """Liking someone else's post puts a notification in their inbox"""
+        fan = User.objects.get(username='fan1')
+        self.client.force_authenticate(fan)
+        self.client.post(reverse('like-post', kwargs={'pk': self.posts[0].pk}))
+        self.assertEqual(Notification.objects.filter(recipient=self.author, actor=fan).count(), 2)
+
+    def test_inbox_page_and_unread_count(self):
+        """The inbox is paginated, resolves targets in bulk and reports unread notifications"""
+        with self.assertNumQueries(4):  # Page joined to actors/content types, targets, sample actors, unread count
+            response = self.client.get(reverse('notification-inbox'), {'page_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['unread_count'], 12)
+        self.assertEqual(response.data['results'][0]['target'], 'Post 11')
+        self.assertEqual(response.data['results'][0]['sample_actors'], ['fan11'])
+
+    def test_mark_read(self):
+        """Selected or all notifications can be marked read in one call"""
+        ids = list(Notification.objects.values_list('id', flat=True)[:5])
+        response = self.client.post(reverse('notification-mark-read'), {'ids': ids}, format='json')
+        self.assertEqual(response.data['marked_read'], 5)
+
+        response = self.client.post(reverse('notification-mark-read'), {'all': True}, format='json')
+        self.assertEqual(response.data['marked_read'], 7)
+        self.assertEqual(self.client.get(reverse('notification-inbox')).data['unread_count'], 0)
+
+    def test_mark_read_requires_ids_or_all(self):
+        response = self.client.post(reverse('notification-mark-read'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False, NOTIFICATION_SAMPLE_ACTORS=2)
+class CoalescingTests(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(author=self.author, title='Viral', content='Body')
+        self.fans = [User.objects.create(username=f'fan{i}') for i in range(5)]
+
+    def test_likes_on_one_post_fold_into_one_row(self):
+        """Repeated activity on the same target updates a single notification in place"""
+        for fan in self.fans:
+            notify(recipient=self.author, actor=fan, verb="liked your post", target=self.post)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.sample_actor_ids, [self.fans[4].pk, self.fans[3].pk])
+        self.assertEqual(str(notification), "fan4 and 4 others liked your post Viral")
+
+    def test_batch_is_folded_before_writing(self):
+        """A queued batch for one target is written as one row"""
+        batch = [Notification(recipient=self.author, actor=fan, verb="liked your post", target=self.post) for fan in self.fans]
+        notification_queue.write(batch)
+        self.assertEqual(Notification.objects.get().actor_count, 5)
+
+    def test_repeated_activity_by_one_actor_counts_once(self):
+        """Liking, unliking and liking again does not inflate the actor count"""
+        for fan in [self.fans[0], self.fans[1]] + [self.fans[0]] * 3:
+            notify(recipient=self.author, actor=fan, verb="liked your post", target=self.post)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(NotificationActor.objects.filter(notification=notification).count(), 2)
+        self.assertEqual(notification.sample_actor_ids, [self.fans[0].pk, self.fans[1].pk])
+        self.assertEqual(str(notification), "fan0 and 1 others liked your post Viral")
+
+    def test_batch_counts_each_actor_once(self):
+        def likes(count):
+            return [Notification(recipient=self.author, actor=self.fans[0], verb="liked your post", target=self.post) for _ in range(count)]
+
+        notification_queue.write(likes(3))
+        notification_queue.write(likes(1))  # Against the open row
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 1)
+        self.assertEqual(str(notification), "fan0 liked your post Viral")
+
+    def test_window_does_not_slide_with_new_activity(self):
+        """A row stops absorbing activity once its window, counted from its creation, is over"""
+        notify(recipient=self.author, actor=self.fans[0], verb="liked your post", target=self.post)
+        Notification.objects.update(started_at=timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW - 60))
+        notify(recipient=self.author, actor=self.fans[1], verb="liked your post", target=self.post)
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+        Notification.objects.update(started_at=timezone.now() - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW + 60))
+        notify(recipient=self.author, actor=self.fans[2], verb="liked your post", target=self.post)
+        self.assertEqual(sorted(Notification.objects.values_list('actor_count', flat=True)), [1, 2])
+
+    @override_settings(NOTIFICATION_COALESCE_WINDOW=0)
+    def test_activity_outside_the_window_starts_a_new_row(self):
+        notify(recipient=self.author, actor=self.fans[0], verb="liked your post", target=self.post)
+        notify(recipient=self.author, actor=self.fans[1], verb="liked your post", target=self.post)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class NotificationQueueTests(APITestCase):
+
+    def test_notifications_are_queued_until_commit_and_written_in_one_batch(self):
+        author = User.objects.create(username='author')
+        posts = [Post.objects.create(author=author, title=f'Post {i}', content='Body') for i in range(3)]
+        fans = [User.objects.create(username=f'fan{i}') for i in range(3)]
+
+        with mock.patch.object(notification_queue, '_ensure_worker'):  # Drain from this thread instead
+            with self.captureOnCommitCallbacks(execute=True):
+                for fan, post in zip(fans, posts):
+                    notify(recipient=author, actor=fan, verb="liked your post", target=post)
+                self.assertEqual(Notification.objects.count(), 0)
+        with self.assertNumQueries(7):  # Window lookup per target, notification and actor bulk inserts, savepoint
+            notification_queue.flush()
+        self.assertEqual(Notification.objects.count(), 3)
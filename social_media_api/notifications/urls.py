@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import InboxView, MarkReadView
+
+urlpatterns = [
+    path('', InboxView.as_view(), name='notification-inbox'),
+    path('mark-read/', MarkReadView.as_view(), name='notification-mark-read'),
+]
@@ -1,3 +1,57 @@
-from django.shortcuts import render
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from posts.pagination import KeysetPagination
+from .models import Notification
+from .serializers import NotificationSerializer, MarkReadSerializer
 
-# Create your views here.
+User = get_user_model()
+
+
+class InboxView(generics.ListAPIView):
+    """
+    Lists the authenticated user's notifications, newest first, with the unread count.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')  # Walks the (recipient, timestamp, id) index
+
+    def get_queryset(self):
+        return (
+            Notification.objects.filter(recipient=self.request.user)
+            .select_related('actor', 'target_ct')
+            .prefetch_related('target')  # One query per target content type, not per row
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        actor_ids = {actor_id for notification in page for actor_id in notification.sample_actor_ids}
+        self.actor_names = dict(User.objects.filter(pk__in=actor_ids).values_list('pk', 'username')) if actor_ids else {}
+
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response.data['unread_count'] = Notification.objects.filter(recipient=request.user, is_read=False).count()
+        return response
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['actor_names'] = getattr(self, 'actor_names', {})  # Sample actors of the whole page, one query
+        return context
+
+
+class MarkReadView(APIView):
+    """
+    Marks several (or all) of the authenticated user's notifications as read in one UPDATE.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        notifications = Notification.objects.filter(recipient=request.user, is_read=False)
+        if not serializer.validated_data['all']:
+            notifications = notifications.filter(id__in=serializer.validated_data['ids'])
+        updated = notifications.update(is_read=True)
+        return Response({"marked_read": updated}, status=status.HTTP_200_OK)
@@ -0,0 +1,164 @@
+"""
+Materialized home feed.
+
+Posts are pushed into their author's followers' feeds when they are created
+(fan-out-on-write), so reading a feed is a single range scan over
+``FeedEntry(owner, created_at)``. Authors with more than
+``settings.FEED_FANOUT_LIMIT`` followers are not pushed; their recent posts
+are read alongside the reader's feed and merged into each page instead
+(fan-out-on-read). Their posts are marked ``fanned_out=False``, and pushed by
+``catch_up_authors`` if the author drops back under the limit, so they do not
+vanish from feeds when the author stops being pulled.
+"""
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from posts.models import Post, FeedEntry
+
+User = get_user_model()
+
+
+def _entries(owner_ids, posts):
+    return [
+        FeedEntry(owner_id=owner_id, post_id=post.pk, created_at=post.created_at)
+        for owner_id in owner_ids
+        for post in posts
+    ]
+
+
+def high_fanout_authors(users):
+    """Return the subset of ``users`` whose posts are not pushed to followers."""
+    return users.filter(followers_count__gt=settings.FEED_FANOUT_LIMIT)
+
+
+def _push(author_id, posts):
+    """Write ``posts`` into the feed of every follower of ``author_id``, a batch of followers at a time."""
+    batch_size = settings.FEED_BATCH_SIZE
+    follower_ids = User.following.through.objects.filter(to_customuser=author_id).values_list(
+        'from_customuser', flat=True,
+    ).iterator(chunk_size=batch_size)
+    batch = []
+    for follower_id in follower_ids:
+        batch.append(follower_id)
+        if len(batch) >= batch_size:
+            FeedEntry.objects.bulk_create(_entries(batch, posts), ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(_entries(batch, posts), ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Push a newly created post into every follower's feed."""
+    if high_fanout_authors(User.objects.filter(pk=post.author_id)).exists():
+        Post.objects.filter(pk=post.pk).update(fanned_out=False)  # Followers pull it on read until catch_up_authors
+        return
+    _push(post.author_id, [post])
+
+
+def catch_up_authors(author_ids):
+    """
+    Push the posts that were pulled on read for those of ``author_ids`` now back under
+    FEED_FANOUT_LIMIT (after losing followers). One indexed query when there is nothing to do.
+    """
+    pending = defaultdict(list)
+    for post in Post.objects.filter(
+        fanned_out=False, author__in=author_ids, author__followers_count__lte=settings.FEED_FANOUT_LIMIT,
+    ).only('pk', 'author_id', 'created_at'):
+        pending[post.author_id].append(post)
+    for author_id, posts in pending.items():
+        _push(author_id, posts)
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(fanned_out=True)
+
+
+def backfill_feeds(edges):
+    """
+    Copy the most recent posts of each followed user into the follower's feed, for many
+    (follower_id, user_id) edges: one windowed query reads every author's latest posts.
+    """
+    recent = defaultdict(list)
+    rows = (
+        Post.objects.filter(author_id__in={user_id for _, user_id in edges})
+        .annotate(rank=Window(RowNumber(), partition_by=F('author_id'), order_by=[F('created_at').desc(), F('id').desc()]))
+        .filter(rank__lte=settings.FEED_BACKFILL_SIZE)
+        .values_list('author_id', 'id', 'created_at')
+    )
+    for author_id, post_id, created_at in rows:
+        recent[author_id].append((post_id, created_at))
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(owner_id=owner_id, post_id=post_id, created_at=created_at)
+            for owner_id, author_id in edges
+            for post_id, created_at in recent[author_id]
+        ],
+        batch_size=settings.FEED_BATCH_SIZE, ignore_conflicts=True,
+    )
+
+
+def backfill_feed(owner_id, author_ids):
+    """Copy the most recent posts of ``author_ids`` into a feed (after a follow)."""
+    backfill_feeds([(owner_id, author_id) for author_id in author_ids])
+
+
+def prune_feeds(edges):
+    """Remove each followed user's posts from the follower's feed, for many edges in one DELETE."""
+    authors = defaultdict(set)
+    for owner_id, author_id in edges:
+        authors[owner_id].add(author_id)
+    if authors:
+        FeedEntry.objects.filter(
+            reduce(or_, (Q(owner_id=owner_id, post__author_id__in=author_ids) for owner_id, author_ids in authors.items()))
+        ).delete()
+
+
+def prune_feed(owner_id, author_ids):
+    """Remove posts of ``author_ids`` from a feed (after an unfollow)."""
+    prune_feeds([(owner_id, author_id) for author_id in author_ids])
+
+
+def followed_high_fanout_authors(user):
+    """
+    Ids of the high-fanout authors ``user`` follows, as a subquery.
+
+    Starts from the few users above the limit (indexed on ``followers_count``)
+    and probes the follow table for each, so the cost does not grow with the
+    number of accounts ``user`` follows.
+    """
+    Follow = User.following.through
+    return Follow.objects.filter(
+        from_customuser=user.pk,
+        to_customuser__in=high_fanout_authors(User.objects.all()).values('pk'),
+    ).values('to_customuser')
+
+
+def get_feed_queryset(user):
+    """
+    Posts in ``user``'s feed, newest first, read from the materialized feed table.
+
+    Ordering and keyset pagination use the annotated ``feed_created_at`` /
+    ``feed_post_id`` columns so the query walks the ``FeedEntry`` index.
+    Posts of high-fanout authors are not in it; see ``get_pulled_queryset``.
+    """
+    return (
+        Post.objects.filter(feed_entries__owner=user)
+        .annotate(feed_created_at=F('feed_entries__created_at'), feed_post_id=F('feed_entries__post'))
+        .order_by('-feed_created_at', '-feed_post_id')
+    )
+
+
+def get_pulled_queryset(user):
+    """
+    Recent posts of the high-fanout authors ``user`` follows, annotated like
+    ``get_feed_queryset`` so the two can be paged with one cursor and merged
+    at read time. Nothing is written.
+    """
+    return (
+        Post.objects.filter(author__in=followed_high_fanout_authors(user))
+        .annotate(feed_created_at=F('created_at'), feed_post_id=F('pk'))
+        .order_by('-feed_created_at', '-feed_post_id')
+    )
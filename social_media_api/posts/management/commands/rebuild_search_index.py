@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index from scratch (e.g. after a bulk import that bypassed signals)."
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        backend.rebuild(Post.objects.only('id', 'title', 'content'))
+        self.stdout.write(f"Indexed {Post.objects.count()} posts with {type(backend).__name__}")
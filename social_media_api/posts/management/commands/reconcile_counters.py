@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, F, Subquery
+from django.db.models.functions import Coalesce
+from posts.models import Post, Comment, Like
+
+User = get_user_model()
+Follow = User.following.through
+
+
+def count_of(model, field):
+    """Correlated COUNT(*) of ``model`` rows whose ``field`` points at the outer row."""
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('*')).values('n')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized follower/following/like/comment counters and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows updated per bulk_update call.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted rows without writing.")
+
+    def handle(self, *args, **options):
+        targets = [
+            (User, {
+                'followers_count': count_of(Follow, 'to_customuser'),
+                'following_count': count_of(Follow, 'from_customuser'),
+            }),
+            (Post, {
+                'likes_count': count_of(Like, 'post'),
+                'comments_count': count_of(Comment, 'post'),
+            }),
+        ]
+        for model, counters in targets:
+            fixed = self.reconcile(model, counters, options['batch_size'], options['dry_run'])
+            self.stdout.write(f"{model._meta.label}: {fixed} row(s) with drifted counters")
+
+    def reconcile(self, model, counters, batch_size, dry_run):
+        actual = {f'actual_{field}': expression for field, expression in counters.items()}
+        drifted = Q()
+        for field in counters:
+            drifted |= ~Q(**{field: F(f'actual_{field}')})
+
+        rows = model.objects.annotate(**actual).filter(drifted).only('pk', *counters)
+        fixed, batch = 0, []
+        for row in rows.iterator(chunk_size=batch_size):
+            for field in counters:
+                setattr(row, field, getattr(row, f'actual_{field}'))
+            batch.append(row)
+            if len(batch) >= batch_size:
+                fixed += self.flush(model, batch, counters, dry_run)
+                batch = []
+        return fixed + self.flush(model, batch, counters, dry_run)
+
+    def flush(self, model, batch, counters, dry_run):
+        if batch and not dry_run:
+            model.objects.bulk_update(batch, list(counters))
+        return len(batch)
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index on PostgreSQL, an FTS5 table on SQLite; other databases use the in-memory backend."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE posts_post SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+        )
+        schema_editor.execute("CREATE INDEX post_search_vector_idx ON posts_post USING gin (search_vector)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, tokenize='unicode61')")
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS post_search_vector_idx")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
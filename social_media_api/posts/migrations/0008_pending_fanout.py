@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled_posts(apps, schema_editor):
+    """Posts of high-fanout authors that no feed holds were pulled on read; mark them for catch-up."""
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(
+        author__followers_count__gt=settings.FEED_FANOUT_LIMIT, feed_entries__isnull=True,
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_feed_read_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('fanned_out', False)), fields=['author'], name='post_pending_fanout_idx'),
+        ),
+        migrations.RunPython(mark_pulled_posts, migrations.RunPython.noop),
+    ]
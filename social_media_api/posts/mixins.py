@@ -0,0 +1,98 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class QueryPlan:
+    """select_related / prefetch_related / only() paths derived from a serializer."""
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+        self.load_all = False  # A source we can't resolve to columns (property, method) needs the whole row
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if self.only and not self.load_all:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def plan_for_serializer(serializer, model, prefix='', plan=None, prefetched=False):
+    """
+    Walk the readable fields of ``serializer`` and record which relations of
+    ``model`` they traverse. Forward relations become select_related (a join);
+    reverse and many-to-many relations become prefetch_related (one extra query).
+    """
+    plan = plan or QueryPlan()
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                plan_for_serializer(field, model, prefix, plan, prefetched)
+            elif not prefix:
+                plan.load_all = True  # SerializerMethodField etc. get the whole instance
+            continue
+        _plan_source(field, field.source_attrs, model, prefix, plan, prefetched)
+    return plan
+
+
+def _plan_source(field, attrs, model, prefix, plan, prefetched):
+    name, rest = attrs[0], attrs[1:]
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        if not prefix:
+            plan.load_all = True
+        return
+
+    path = prefix + name
+    if not model_field.is_relation:
+        if not prefetched:
+            plan.only.add(path)
+        return
+
+    forward = model_field.many_to_one or (model_field.one_to_one and model_field.concrete)
+    if forward and not prefetched:
+        plan.only.add(path)
+        if not rest and isinstance(field, serializers.PrimaryKeyRelatedField):
+            return  # Rendered from the local <fk>_id column, no join needed
+        plan.select_related.add(path)
+    else:
+        plan.prefetch_related.add(path)
+        prefetched = True
+
+    related_model = model_field.related_model
+    if rest:
+        _plan_source(field, rest, related_model, path + '__', plan, prefetched)
+    elif isinstance(field, serializers.ListSerializer):
+        plan_for_serializer(field.child, related_model, path + '__', plan, prefetched)
+    elif isinstance(field, serializers.BaseSerializer):
+        plan_for_serializer(field, related_model, path + '__', plan, prefetched)
+
+
+class QueryPlanningMixin:
+    """
+    Viewset mixin that optimizes ``get_queryset()`` for the view's serializer.
+
+    The serializer's declared ``source`` paths are inspected once per view class
+    and turned into ``select_related``/``prefetch_related``/``only()`` calls, so a
+    list page costs a fixed number of queries regardless of its size.
+    """
+
+    def get_queryset(self):
+        return self.get_query_plan().apply(super().get_queryset())
+
+    def get_query_plan(self):
+        cls = type(self)
+        serializer_class = self.get_serializer_class()
+        cache = cls.__dict__.get('_query_plans')
+        if cache is None:
+            cache = cls._query_plans = {}
+        if serializer_class not in cache:
+            cache[serializer_class] = plan_for_serializer(serializer_class(), serializer_class.Meta.model)
+        return cache[serializer_class]
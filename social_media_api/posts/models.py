@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 
 User = get_user_model()
@@ -10,6 +11,20 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, updated atomically with F() and reconciled by `manage.py reconcile_counters`
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Weighted title/content tsvector for PostgresSearchBackend (posts/search.py); GIN-indexed on PostgreSQL only
+    search_vector = SearchVectorField(null=True, editable=False)
+    # False for posts written while the author was pulled on read; pushed once they are back under the limit (posts/feed.py)
+    fanned_out = models.BooleanField(default=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),  # Keyset pagination
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),  # Feed fan-out-on-read
+            models.Index(fields=['author'], condition=models.Q(fanned_out=False), name='post_pending_fanout_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -21,6 +36,11 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_id_idx'),  # Keyset pagination
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
@@ -33,4 +53,22 @@ class Like(models.Model):
         unique_together = ['user', 'post']  # Ensure a user can only like a post once
 
     def __str__(self):
-        return f"{self.user.username} likes {self.post.title}"
\ No newline at end of file
+        return f"{self.user.username} likes {self.post.title}"
+
+
+class FeedEntry(models.Model):
+    """
+    Materialized home feed row: one per (follower, post) pair, written when the post is created.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_entries")  # User whose feed this row belongs to
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="feed_entries")
+    created_at = models.DateTimeField()  # Copy of post.created_at so the feed can be read from this table's index alone
+
+    class Meta:
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='feed_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post.title} in {self.owner.username}'s feed"
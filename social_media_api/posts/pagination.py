@@ -0,0 +1,126 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a (sort field, unique tiebreaker) pair.
+
+    Each page is fetched with a range condition on the ordering index instead of
+    an OFFSET, and no COUNT(*) is issued, so page N costs the same as page 1.
+    The cursor is an opaque token encoding the last row's key. Views can set
+    ``keyset_ordering`` to page on other (e.g. annotated) columns, and define
+    ``get_merged_querysets()`` to page further querysets with the same cursor
+    and merge their rows into each page.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.base_url = request.build_absolute_uri()
+
+        position = self.decode_cursor(request)
+        results = self.fetch(queryset, position)
+        merged = getattr(view, 'get_merged_querysets', None)
+        if merged is not None:
+            results = self.merge(results, *(self.fetch(other, position) for other in merged()))
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def fetch(self, queryset, position):
+        """Up to one row more than a page after ``position``; the extra row tells us whether there is a next page."""
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return list(queryset[:self.page_size + 1])
+
+    def merge(self, *pages):
+        """Interleave rows fetched from several querysets in ``self.ordering``, dropping repeated objects."""
+        rows = {}
+        for page in pages:
+            for row in page:
+                rows.setdefault(row.pk, row)
+        fields = self.fields()
+        results = sorted(rows.values(), key=lambda row: [getattr(row, field) for field in fields], reverse=self.ordering[0].startswith('-'))
+        return results[:self.page_size + 1]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def after(self, position):
+        """Rows strictly after ``position`` in ``self.ordering``, expressed as an index range."""
+        (sort_field, tiebreaker), (sort_value, tiebreaker_value) = self.fields(), position
+        if self.ordering[0].startswith('-'):
+            return Q(**{f'{sort_field}__lte': sort_value}) & ~Q(**{sort_field: sort_value, f'{tiebreaker}__gte': tiebreaker_value})
+        return Q(**{f'{sort_field}__gte': sort_value}) & ~Q(**{sort_field: sort_value, f'{tiebreaker}__lte': tiebreaker_value})
+
+    def fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != 2:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, instance):
+        # isoformat() keeps microseconds; DjangoJSONEncoder would truncate them and break tie ordering
+        position = [getattr(instance, field) for field in self.fields()]
+        position = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                    'example': f'http://api.example.org/accounts/?{self.cursor_query_param}=WyIyMDI1LTAxLTAxVDAwOjAwOjAwWiIsIDEwXQ==',
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,239 @@
+"""
+Full-text search for posts.
+
+Three interchangeable backends rank posts by relevance to a query, match
+word prefixes (``dja`` finds "Django") and are kept up to date incrementally
+by the Post save/delete receivers in posts/signals.py:
+
+* ``PostgresSearchBackend``: a stored ``search_vector`` tsvector column behind
+  a GIN index, ranked with ``ts_rank``.
+* ``SQLiteSearchBackend``: an FTS5 table ranked with ``bm25()`` for local runs.
+* ``InMemorySearchBackend``: a pure-Python inverted index, for tests.
+
+``settings.POST_SEARCH_BACKEND`` is a dotted path to one of them, or
+``'auto'`` to pick by database vendor. ``search()`` returns the queryset
+filtered to matches and annotated with ``search_rank`` (higher is better);
+``PostSearchFilter`` exposes it as ``?search=`` on the post API.
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+FTS_TABLE = 'posts_post_fts'
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD_RE.findall(text or '')]
+
+
+def rank_annotation(scores):
+    """Annotate rows with ranks computed outside the database."""
+    whens = [When(pk=pk, then=Value(score)) for pk, score in scores.items()]
+    return Case(*whens, default=Value(0.0), output_field=FloatField())
+
+
+class BaseSearchBackend:
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, post):
+        """Add or refresh ``post`` in the index."""
+
+    def remove(self, post_id):
+        """Drop ``post_id`` from the index."""
+
+    def rebuild(self, posts):
+        for post in posts:
+            self.index(post)
+
+    def _ranked(self, queryset, scores):
+        best = sorted(scores, key=scores.get, reverse=True)[:settings.POST_SEARCH_MAX_RESULTS]
+        scores = {pk: scores[pk] for pk in best}
+        return queryset.filter(pk__in=list(scores)).annotate(search_rank=rank_annotation(scores))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = 'english'
+
+    def vector(self):
+        return SearchVector('title', weight='A', config=self.config) + SearchVector('content', weight='B', config=self.config)
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        tsquery = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=self.config)
+        return queryset.filter(search_vector=tsquery).annotate(search_rank=SearchRank('search_vector', tsquery))
+
+    def index(self, post):
+        type(post).objects.filter(pk=post.pk).update(search_vector=self.vector())
+
+    def rebuild(self, posts):
+        posts.update(search_vector=self.vector())
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        match = ' '.join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 2.0, 1.0) LIMIT %s',
+                [match, settings.POST_SEARCH_MAX_RESULTS],
+            )
+            scores = {pk: -score for pk, score in cursor.fetchall()}  # bm25() is lower-is-better
+        return self._ranked(queryset, scores)
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)', [post.pk, post.title, post.content])
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self, posts):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        super().rebuild(posts.iterator())
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Inverted index of term -> {post id: weighted term frequency}, loaded from the
+    database on first use. Title words weigh double. Per process only.
+    """
+    title_weight = 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.postings = defaultdict(dict)
+        self.documents = {}  # post id -> its terms, to unindex on update/delete
+        self.terms = []  # Sorted vocabulary, for prefix lookups
+
+    def _load(self):
+        from posts.models import Post
+        if not self.loaded:
+            self.rebuild(Post.objects.only('id', 'title', 'content').iterator())
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.none()
+        with self.lock:
+            self._load()
+            scores = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                for word in self._expand(term):
+                    postings = self.postings[word]
+                    if not postings:
+                        continue  # Every post using the word was removed since the vocabulary was sorted
+                    idf = math.log(1 + len(self.documents) / len(postings))
+                    for pk, frequency in postings.items():
+                        term_scores[pk] += frequency * idf
+                scores = term_scores if scores is None else {
+                    pk: score + term_scores[pk] for pk, score in scores.items() if pk in term_scores
+                }
+        return self._ranked(queryset, scores)
+
+    def _expand(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        words = []
+        for word in self.terms[start:]:
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def index(self, post):
+        with self.lock:
+            if not self.loaded:
+                return  # The first search loads everything from the database anyway
+            self._unindex(post.pk)
+            self._index(post)
+            self.terms = sorted(word for word, postings in self.postings.items() if postings)
+
+    def remove(self, post_id):
+        with self.lock:
+            self._unindex(post_id)
+
+    def rebuild(self, posts):
+        self.loaded = True
+        self.postings.clear()
+        self.documents.clear()
+        for post in posts:
+            self._index(post)
+        self.terms = sorted(self.postings)
+
+    def _index(self, post):
+        frequencies = defaultdict(int)
+        for word in tokenize(post.title):
+            frequencies[word] += self.title_weight
+        for word in tokenize(post.content):
+            frequencies[word] += 1
+        for word, frequency in frequencies.items():
+            self.postings[word][post.pk] = frequency
+        self.documents[post.pk] = list(frequencies)
+
+    def _unindex(self, post_id):
+        for word in self.documents.pop(post_id, []):
+            self.postings[word].pop(post_id, None)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = settings.POST_SEARCH_BACKEND
+        if path == 'auto':
+            path = {
+                'postgresql': 'posts.search.PostgresSearchBackend',
+                'sqlite': 'posts.search.SQLiteSearchBackend',
+            }.get(connection.vendor, 'posts.search.InMemorySearchBackend')
+        _backend = import_string(path)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'POST_SEARCH_BACKEND':
+        _backend = None
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """``?search=`` filter ranking posts through the configured search backend, best match first."""
+    search_param = 'search'
+    ordering = ('-search_rank', '-id')
+
+    @classmethod
+    def get_query(cls, request):
+        return request.query_params.get(cls.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_query(request)
+        if not query:
+            return queryset
+        return get_backend().search(queryset, query).order_by(*self.ordering)
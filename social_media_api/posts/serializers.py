@@ -6,8 +6,8 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']  # These fields should not be manually modified
+        fields = ['id', 'author', 'title', 'content', 'likes_count', 'comments_count', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'likes_count', 'comments_count', 'created_at', 'updated_at']  # These fields should not be manually modified
 
 
 class CommentSerializer(serializers.ModelSerializer):
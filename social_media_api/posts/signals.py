@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from accounts.follow_graph import follows_changed
+from posts import feed, search
+from posts.models import FeedEntry, Post
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.following.through)
+def sync_feed_on_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep materialized feeds in step with follow/unfollow."""
+    if action in ('post_add', 'post_remove'):
+        if reverse:  # instance gained or lost followers
+            edges = [(follower_id, instance.pk) for follower_id in pk_set]
+        else:  # instance followed or unfollowed users
+            edges = [(instance.pk, user_id) for user_id in pk_set]
+        if action == 'post_add':
+            feed.backfill_feeds(edges)
+        else:
+            feed.prune_feeds(edges)
+            feed.catch_up_authors({user_id for _, user_id in edges})  # Counters are already updated (accounts.signals)
+    elif action == 'pre_clear':
+        if reverse:
+            FeedEntry.objects.filter(post__author=instance).delete()
+        else:
+            FeedEntry.objects.filter(owner=instance).delete()
+
+
+@receiver(follows_changed)
+def sync_feeds_on_bulk_follow(sender, action, edges, **kwargs):
+    """The bulk path (accounts/follow_graph.py): one backfill or prune per chunk of edges."""
+    if action == 'post_add':
+        feed.backfill_feeds(edges)
+    elif action == 'post_remove':
+        feed.prune_feeds(edges)
+        feed.catch_up_authors({user_id for _, user_id in edges})
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
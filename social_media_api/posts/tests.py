@@ -1,3 +1,265 @@
-from django.test import TestCase
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .models import Post, Comment, Like, FeedEntry
 
-# Create your tests here.
+User = get_user_model()
+
+
+class QueryBudgetMixin:
+    """
+    Test helper asserting that an endpoint stays within a fixed number of
+    queries, and that the number does not grow with the page size (no N+1).
+    """
+    budget_page_sizes = (1, 5, 20)
+
+    def assertQueryBudget(self, url, budget, **params):
+        counts = {}
+        for page_size in self.budget_page_sizes:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {**params, 'page_size': page_size})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts[page_size] = len(queries)
+
+        self.assertEqual(len(set(counts.values())), 1, f"Query count grows with page size: {counts}")
+        self.assertLessEqual(max(counts.values()), budget, f"Query budget of {budget} exceeded: {counts}")
+
+
+class FeedTests(APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.other = User.objects.create_user(username='other', password='testpass')
+        self.reader.follow(self.author)
+
+    def create_post(self, user, title):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):  # Fan-out runs once the post is committed
+            response = self.client.post(reverse('post-list'), {'title': title, 'content': 'Body'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=response.data['id'])
+
+    def feed_titles(self):
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('user-feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in response.data['results']]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Creating a post writes one feed row per follower"""
+        post = self.create_post(self.author, 'Hello')
+        self.create_post(self.other, 'Not followed')
+
+        self.assertTrue(FeedEntry.objects.filter(owner=self.reader, post=post).exists())
+        self.assertEqual(self.feed_titles(), ['Hello'])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Following copies recent posts into the feed, unfollowing removes them"""
+        self.create_post(self.other, 'Older post')
+        self.reader.follow(self.other)
+        self.assertEqual(self.feed_titles(), ['Older post'])
+
+        self.reader.unfollow(self.other)
+        self.assertEqual(self.feed_titles(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_high_fanout_author_is_pulled_on_read(self):
+        """Authors above the fan-out limit are not pushed but still show up in the feed"""
+        self.create_post(self.author, 'Popular')
+        self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())
+        self.assertEqual(self.feed_titles(), ['Popular'])
+        self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())  # Reading does not write
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_pulled_posts_are_merged_into_pages(self):
+        """Pushed and pulled posts interleave by date across pages, each once"""
+        self.reader.follow(self.other)
+        User.objects.filter(pk=self.other.pk).update(followers_count=2)  # Above the limit: pulled
+        titles = [self.create_post(self.author if i % 2 else self.other, f'Post {i}').title for i in range(7)]
+        self.assertEqual(FeedEntry.objects.filter(owner=self.reader).count(), 3)
+
+        self.client.force_authenticate(self.reader)
+        response, seen = self.client.get(reverse('user-feed'), {'page_size': 3}), []
+        while True:
+            seen.extend(post['title'] for post in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, titles[::-1])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_pulled_posts_are_pushed_when_author_drops_under_limit(self):
+        """Posts written while an author was pulled stay in feeds once the author is pushed again"""
+        self.other.follow(self.author)  # Two followers: above the limit
+        self.create_post(self.author, 'Popular')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_titles(), ['Popular'])
+
+        self.other.unfollow(self.author)  # Back under the limit: no longer pulled
+        self.assertEqual(self.feed_titles(), ['Popular'])
+        self.assertTrue(FeedEntry.objects.filter(owner=self.reader, post__title='Popular').exists())
+        self.assertFalse(Post.objects.filter(fanned_out=False).exists())
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f'Post {i}', content='Body') for i in range(25)
+        ]
+
+    def test_walks_every_post_once_without_count(self):
+        """Following next links returns each post exactly once, newest first, without a COUNT query"""
+        url, seen = reverse('post-list'), []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_invalid_cursor(self):
+        """A tampered cursor is rejected with 404 rather than a server error"""
+        response = self.client.get(reverse('post-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CounterTests(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='Body')
+        self.client.force_authenticate(self.reader)
+
+    def test_like_and_comment_counters(self):
+        """Likes and comments update the post counters in place"""
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))
+        self.client.post(reverse('like-post', kwargs={'pk': self.post.pk}))  # Duplicate like is rejected
+        response = self.client.post(reverse('comment-list'), {'post': self.post.pk, 'content': 'Nice'}, format='json')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+
+        self.client.post(reverse('unlike-post', kwargs={'pk': self.post.pk}))
+        self.client.delete(reverse('comment-detail', kwargs={'pk': response.data['id']}))
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (0, 0))
+
+    def test_follow_counters(self):
+        """Follow/unfollow keep both users' counters in step"""
+        self.reader.follow(self.author)
+        self.reader.follow(self.author)  # Already following: no change
+        self.author.refresh_from_db()
+        self.reader.refresh_from_db()
+        self.assertEqual((self.author.followers_count, self.reader.following_count), (1, 1))
+
+        self.reader.unfollow(self.author)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+    def test_reconcile_counters(self):
+        """The management command repairs counters that drifted"""
+        Like.objects.create(user=self.reader, post=self.post)  # Bypasses the view, so the counter drifts
+        User.objects.filter(pk=self.author.pk).update(followers_count=5)
+
+        call_command('reconcile_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.author.followers_count, 0)
+
+
+class SearchTests(APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.reader)
+        self.django = Post.objects.create(author=self.reader, title='Django tips', content='Use select_related for joins.')
+        self.mention = Post.objects.create(author=self.reader, title='Weekend', content='Read a django book.')
+        Post.objects.create(author=self.reader, title='Flask notes', content='Blueprints and views.')
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('post-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def titles(self, query):
+        return [post['title'] for post in self.search(query).data['results']]
+
+    def check_backend(self):
+        self.assertEqual(self.titles('django'), ['Django tips', 'Weekend'])  # Title match ranks first
+        self.assertEqual(self.titles('dja'), ['Django tips', 'Weekend'])  # Prefix match
+        self.assertEqual(self.titles('django book'), ['Weekend'])  # Every term must match
+        self.assertEqual(self.titles('rails'), [])
+
+        self.mention.content = 'Read a rails book.'
+        self.mention.save()
+        self.assertEqual(self.titles('django'), ['Django tips'])
+        self.assertEqual(self.titles('rails'), ['Weekend'])
+        self.django.delete()
+        self.assertEqual(self.titles('django'), [])
+
+    def test_sqlite_backend(self):
+        self.check_backend()
+
+    @override_settings(POST_SEARCH_BACKEND='posts.search.InMemorySearchBackend')
+    def test_in_memory_backend(self):
+        self.check_backend()
+
+    def test_pages_by_rank(self):
+        for i in range(4):
+            Post.objects.create(author=self.reader, title=f'Django {i}', content='django ' * i)
+        seen, response = [], self.search('django', page_size=2)
+        while True:
+            seen += [post['id'] for post in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_rebuild_search_index(self):
+        Post.objects.bulk_create([Post(author=self.reader, title='Imported django post', content='')])  # No signals
+        self.assertEqual(len(self.titles('imported')), 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.titles('imported'), ['Imported django post'])
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.client.force_authenticate(self.reader)
+        for i in range(25):
+            author = User.objects.create(username=f'author{i}')
+            self.reader.follow(author)
+            post = Post.objects.create(author=author, title=f'Post {i}', content='Body')
+            Comment.objects.create(post=post, author=author, content='First')
+        FeedEntry.objects.bulk_create(
+            FeedEntry(owner=self.reader, post=post, created_at=post.created_at) for post in Post.objects.all()
+        )
+
+    def test_post_list_budget(self):
+        self.assertQueryBudget(reverse('post-list'), 1)
+
+    def test_post_search_budget(self):
+        self.assertQueryBudget(reverse('post-list'), 2, search='Post')  # FTS5 lookup + ranked page
+
+    def test_comment_list_budget(self):
+        self.assertQueryBudget(reverse('comment-list'), 1)
+
+    def test_feed_budget(self):
+        self.assertQueryBudget(reverse('user-feed'), 2)  # Feed page + high-fanout authors' page
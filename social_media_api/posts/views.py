@@ -1,27 +1,40 @@
-from rest_framework import viewsets, generics,permissions, filters, status
+from functools import partial
+from rest_framework import viewsets, generics,permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
-from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
 from posts.models import Post, Comment, Like
 from posts.serializers import PostSerializer, CommentSerializer, LikeSerializer
-from notifications.models import Notification
+from posts import feed
+from posts.mixins import QueryPlanningMixin
+from posts.pagination import KeysetPagination
+from posts.search import PostSearchFilter
+from notifications.delivery import notify
 
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(QueryPlanningMixin, viewsets.ModelViewSet):
     """
     API endpoint for creating, retrieving, updating, and deleting posts.
     """
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]  # Only authenticated users can interact
     queryset = Post.objects.all().order_by('-created_at')
+    pagination_class = KeysetPagination  # Cursor pagination on (created_at, id)
 
-    filter_backends = [filters.SearchFilter]  # Enables search filtering
-    search_fields = ['title', 'content']  # Searchable fields
+    filter_backends = [PostSearchFilter]  # Ranked full-text ?search= (see posts/search.py)
+
+    @property
+    def keyset_ordering(self):
+        if PostSearchFilter.get_query(self.request):
+            return PostSearchFilter.ordering  # Page through matches by relevance
+        return KeysetPagination.ordering
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)  # Set the logged-in user as the author
+        post = serializer.save(author=self.request.user)  # Set the logged-in user as the author
+        transaction.on_commit(partial(feed.fan_out_post, post))  # Push the post into followers' feeds once saved
 
     def perform_update(self, serializer):
         if self.get_object().author != self.request.user:
@@ -34,18 +47,19 @@ class PostViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryPlanningMixin, viewsets.ModelViewSet):
     """
     API endpoint for creating, retrieving, updating, and deleting comments.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    queryset = Comment.objects.all().order_by('-created_at')
 
-    def get_queryset(self):
-        return Comment.objects.all().order_by('-created_at')
-
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        Post.objects.filter(pk=comment.post_id).update(comments_count=F('comments_count') + 1)
 
     def perform_update(self, serializer):
         if self.get_object().author != self.request.user:
@@ -55,19 +69,26 @@ class CommentViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             raise PermissionDenied("You do not have permission to delete this comment.")
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') - 1)
 
-class FeedView(generics.ListAPIView):
+class FeedView(QueryPlanningMixin, generics.ListAPIView):
     """
     Returns a feed of posts from users the authenticated user follows.
+    Reads the materialized feed filled by PostViewSet.perform_create, merged with
+    the recent posts of followed high-fanout authors (see posts/feed.py).
     """
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-feed_created_at', '-feed_post_id')  # Page on the FeedEntry index columns
 
     def get_queryset(self):
-        user = self.request.user
-        following_users = user.following.all()  # Get all users the authenticated user follows
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
+        return self.get_query_plan().apply(feed.get_feed_queryset(self.request.user))
+
+    def get_merged_querysets(self):
+        return [self.get_query_plan().apply(feed.get_pulled_queryset(self.request.user))]  # High-fanout authors
 
 
 class LikePostView(APIView):
@@ -80,18 +101,15 @@ class LikePostView(APIView):
         post = generics.get_object_or_404(Post, pk=pk)
 
         # Try to get or create a like for the post by the current user
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                Post.objects.filter(pk=post.pk).update(likes_count=F('likes_count') + 1)
 
         if created:
-            # Create a notification for the post author
+            # Queue a notification for the post author (written off the request path)
             if post.author != request.user:  # Avoid self-notification
-                Notification.objects.create(
-                    recipient=post.author,
-                    actor=request.user,
-                    verb="liked your post",
-                    target=post,
-                    target_ct=ContentType.objects.get_for_model(post)
-                )
+                notify(recipient=post.author, actor=request.user, verb="liked your post", target=post)
 
             serializer = LikeSerializer(like)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -117,6 +135,8 @@ class UnlikePostView(APIView):
             return Response({"error": "You have not liked this post."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Remove the like
-        like.delete()
+        with transaction.atomic():
+            like.delete()
+            Post.objects.filter(pk=post.pk).update(likes_count=F('likes_count') - 1)
 
         return Response({"message": "Post unliked successfully."}, status=status.HTTP_200_OK)
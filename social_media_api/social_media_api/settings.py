@@ -47,12 +47,44 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Adjust the number of items per page as needed
 }
 
+# Token lookup cache (accounts/authentication.py)
+TOKEN_CACHE_SIZE = 10000  # Entries in each process's LRU
+TOKEN_CACHE_TTL = 30  # Seconds an LRU entry lives; bounds staleness across processes
+TOKEN_CACHE_ALIAS = None  # Optional CACHES alias shared between processes, e.g. 'default'
+TOKEN_SHARED_CACHE_TTL = 300  # Seconds an entry lives in the shared cache
+
+# Bulk follow/unfollow (accounts/follow_graph.py)
+FOLLOW_BATCH_SIZE = 1000  # Edges validated and written per chunk
+BULK_FOLLOW_MAX_ITEMS = 5000  # User ids accepted per bulk follow/unfollow request
+
+# Notification delivery (notifications/delivery.py)
+NOTIFICATIONS_ASYNC = True  # Write notifications from a background thread instead of the request
+NOTIFICATION_BATCH_SIZE = 500  # Rows per bulk_create
+NOTIFICATION_FLUSH_INTERVAL = 1.0  # Seconds to wait for a batch to fill
+NOTIFICATION_COALESCE_WINDOW = 24 * 60 * 60  # Seconds during which same recipient/verb/target notifications fold into one
+NOTIFICATION_SAMPLE_ACTORS = 3  # Actors kept on a coalesced notification
+
+# Profile picture thumbnails (accounts/images.py)
+PROFILE_THUMBNAIL_SIZES = {'small': 48, 'medium': 128, 'large': 320}  # Longest edge in pixels
+PROFILE_THUMBNAIL_QUALITY = 80  # WebP quality
+IMAGE_PROCESSING_ASYNC = True  # Resize in a process pool after commit instead of inline
+IMAGE_PROCESS_WORKERS = 2
+
+# Home feed (posts/feed.py)
+FEED_FANOUT_LIMIT = 10000  # Authors with more followers than this are pulled on read instead of pushed on write
+FEED_BACKFILL_SIZE = 50  # Recent posts copied into a feed when following someone
+FEED_BATCH_SIZE = 1000  # Rows per bulk insert when fanning a post out
+
+# Post search (posts/search.py)
+POST_SEARCH_BACKEND = 'auto'  # Dotted path to a backend class, or 'auto' to pick by database vendor
+POST_SEARCH_MAX_RESULTS = 1000  # Best-ranked matches kept by the SQLite and in-memory backends
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',